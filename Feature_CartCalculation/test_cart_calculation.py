@@ -8,410 +8,356 @@
 #
 
 import csv
+import math
 import os
+import re
+import statistics
 import sys
+from collections import Counter
 from datetime import datetime
-from time import sleep
-from typing import List, Dict
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import (FeatureTest, PerformanceCollector, build_parser, parse_counts, parse_ids,
+                    parse_result, run)
 
+logger = logging.getLogger(__name__)
 
-class SeleniumHelper:
-    """Helper class for Selenium operations"""
-
-    def __init__(self, headless: bool = False):
-        self.driver = None
-        self.headless = headless
-
-    def start_driver(self):
-        """Start Chrome WebDriver"""
-        options = ChromeOptions()
-        if self.headless:
-            options.add_argument("--headless=new")
-            options.add_argument("--disable-gpu")
-
-        options.add_argument("--log-level=3")
-        options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.implicitly_wait(10)
-        self.driver.set_page_load_timeout(30)
-        self.driver.maximize_window()
-        logger.info("WebDriver started successfully")
-        return self.driver
-
-    def quit_driver(self):
-        """Quit WebDriver"""
-        if self.driver:
-            try:
-                self.driver.quit()
-                logger.info("WebDriver closed")
-            except Exception as e:
-                logger.error(f"Error closing WebDriver: {e}")
-
-    def clear_storage(self):
-        """Clear browser storage"""
-        if self.driver:
-            try:
-                self.driver.execute_script("window.localStorage.clear();")
-                self.driver.execute_script("window.sessionStorage.clear();")
-                self.driver.delete_all_cookies()
-                logger.info("Storage cleared")
-            except Exception as e:
-                logger.error(f"Error clearing storage: {e}")
-
-
-class CartCalculationTest:
-    """Test class for Cart Calculation functionality"""
 
-    BASE_URL = "https://sweetshop.netlify.app/sweets"
-    BASKET_URL = "https://sweetshop.netlify.app/basket"
+class CartCalculationCase(NamedTuple):
+    """One parsed and validated row of the Cart Calculation test data"""
+    test_id: str
+    description: str
+    product_ids: Tuple[int, ...]
+    quantities: Tuple[int, ...]
+    shipping: bool
+    expected_total: Optional[str]
+    expected_result: str
+    checkpoint: Optional[str]
+
+    @classmethod
+    def from_row(cls, row: Optional[Dict]) -> 'CartCalculationCase':
+        """Build a typed case from a raw CSV or JSONL row"""
+        if row is None:
+            raise ValueError("row is not a valid JSON object")
+
+        test_id = (row.get('TestID') or '').strip()
+        if not test_id:
+            raise ValueError("missing TestID")
+
+        product_ids = parse_ids(row.get('Product_IDs') or '')
+
+        quantities = (row.get('Product_Quantities') or '').strip()
+        match = re.fullmatch(r'(.+?)\s*\+\s*shipping', quantities)
+        if match:
+            quantities = match.group(1)
+
+        # 'calculated' means the expected total is computed from the basket page
+        total = (row.get('Expected_Total') or '').strip()
+        if total != 'calculated' and not re.fullmatch(r'£\d+\.\d{2}', total):
+            raise ValueError(f"invalid Expected_Total '{total}'")
+
+        return cls(
+            test_id=test_id,
+            description=(row.get('Description') or '').strip(),
+            product_ids=product_ids,
+            quantities=parse_counts(quantities, len(product_ids)),
+            shipping=match is not None,
+            expected_total=None if total == 'calculated' else total,
+            expected_result=parse_result(row.get('Expected_Result') or ''),
+            checkpoint=(row.get('Checkpoint') or '').strip() or None
+        )
 
-    def __init__(self):
-        self.helper = SeleniumHelper(headless=False)
-        self.driver = None
-        self.test_results = []
 
-    def setup(self):
-        """Setup test environment"""
-        self.driver = self.helper.start_driver()
+class CartCalculationTest(FeatureTest):
+    """Test class for Cart Calculation functionality"""
 
-    def teardown(self):
-        """Cleanup test environment"""
-        self.helper.quit_driver()
+    NAME = "Cart Calculation"
+    CASE_TYPE = CartCalculationCase
+    DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_data.csv")
+    BENCHMARK_ROW = "TC_002_004"
 
-    def clear_cart(self):
-        """Clear cart before each test"""
-        self.helper.clear_storage()
+    def fast_TC_002_006(self, test_case: CartCalculationCase):
+        """DTT - Formula: 1 Item, Total = Price × 1, checked against the catalog price"""
+        logger.info(f"Running {test_case.test_id} over HTTP: {test_case.description}")
 
-    def load_test_data(self) -> List[Dict]:
-        """Load test data from CSV file"""
-        csv_path = os.path.join(os.path.dirname(__file__), "test_data.csv")
-        test_data = []
+        try:
+            product_id = test_case.product_ids[0]
+            product = self.get_catalog().get(product_id)
+            assert product is not None, f"FAIL: Product {product_id} not in catalog"
+            assert product['price'] is not None, f"FAIL: Product {product_id} has no catalog price"
 
-        with open(csv_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                test_data.append(row)
+            expected_total = f"£{product['price'] * test_case.quantities[0]:.2f}"
+            logger.info(f"Catalog price: {product['price']}, Expected total: {test_case.expected_total}")
+            assert expected_total == test_case.expected_total, f"FAIL: Total = {expected_total}, expected = {test_case.expected_total}"
 
-        logger.info(f"Loaded {len(test_data)} test cases from CSV")
-        return test_data
+            logger.info(f"PASS: {test_case.test_id}")
+            return "PASS"
 
-    def get_total_from_basket(self) -> str:
-        """Get total amount from basket page"""
-        total_element = WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.XPATH, '//li/span[text()="Total (GBP)"]/following-sibling::strong'))
-        )
-        return total_element.text.strip()
+        except AssertionError as e:
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
+            return "FAIL"
+        except Exception as e:
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
+            return "ERROR"
 
-    def test_TC_002_001(self, test_case: Dict):
+    def test_TC_002_001(self, test_case: CartCalculationCase):
         """BVA - Empty Cart Total"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_002(self, test_case: Dict):
+    def test_TC_002_002(self, test_case: CartCalculationCase):
         """BVA - Single Item Total"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
+            self.sweets.open()
 
-            product_id = test_case['Product_IDs']
-            element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-            )
-            product_name = element.get_attribute("data-name")
-            product_price = element.get_attribute("data-price")
-            logger.info(f"Adding product {product_name} with price {product_price} to cart")
-            element.click()
+            product_id = test_case.product_ids[0]
+            product = self.sweets.products()[product_id]
+            logger.info(f"Adding product {product['name']} with price {product['price']} to cart")
+            with self.track_latency("badge_update", By.CSS_SELECTOR, self.BADGE_SELECTOR):
+                self.sweets.click_product(product_id)
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_003(self, test_case: Dict):
+    def test_TC_002_003(self, test_case: CartCalculationCase):
         """BVA - Typical Multi-Item"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
+            self.sweets.open()
 
-            product_ids = test_case['Product_IDs'].split('|')
-            quantities = [int(q) for q in test_case['Product_Quantities'].split('|')]
+            product_ids = test_case.product_ids
+            quantities = test_case.quantities
 
             for i, product_id in enumerate(product_ids):
-                element = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-                )
                 qty = quantities[i]
                 logger.info(f"Adding product {product_id} x{qty} to cart")
                 for _ in range(qty):
-                    element.click()
+                    self.sweets.click_product(product_id)
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_004(self, test_case: Dict):
+    def test_TC_002_004(self, test_case: CartCalculationCase):
         """BVA - Large Quantity Total"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
-
-            product_id = test_case['Product_IDs']
-            quantity = int(test_case['Product_Quantities'])
+            self.sweets.open()
 
-            element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-            )
+            product_id = test_case.product_ids[0]
+            quantity = test_case.quantities[0]
 
             logger.info(f"Adding product {product_id} x{quantity} to cart")
             for i in range(quantity):
-                element.click()
+                self.sweets.click_product(product_id)
                 if (i + 1) % 10 == 0:
-                    logger.info(f"Progress: {i + 1}/{quantity}")
+                    logger.debug("Progress: %d/%d", i + 1, quantity)
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_005(self, test_case: Dict):
+    def test_TC_002_005(self, test_case: CartCalculationCase):
         """ECP - Low Price Items"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
+            self.sweets.open()
 
-            product_id = test_case['Product_IDs']
-            quantity = int(test_case['Product_Quantities'])
-
-            element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-            )
+            product_id = test_case.product_ids[0]
+            quantity = test_case.quantities[0]
 
             logger.info(f"Adding product {product_id} (Bubble Gums) x{quantity} to cart")
             for _ in range(quantity):
-                element.click()
+                self.sweets.click_product(product_id)
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_006(self, test_case: Dict):
+    def test_TC_002_006(self, test_case: CartCalculationCase):
         """DTT - Formula: 1 Item, Total = Price × 1"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
+            self.sweets.open()
 
-            product_id = test_case['Product_IDs']
-            element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-            )
-            element.click()
-            product_price = float(element.get_attribute("data-price"))
+            product_id = test_case.product_ids[0]
+            product = self.sweets.click_product(product_id)
+            product_price = float(product['price'])
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            price_element = self.driver.find_element(By.CSS_SELECTOR, "#basketItems li span.text-muted")
-            qty_element = self.driver.find_element(By.CSS_SELECTOR, "#basketItems li small.text-muted")
-            total_text = self.get_total_from_basket()
+            items = self.basket.items()
+            assert items, "FAIL: Basket is empty"
+            total_text = self.basket.total()
 
-            price_val = float(price_element.text.strip().replace("£", ""))
-            qty_val = int(qty_element.text.strip().replace("x ", ""))
+            price_val = float(items[0]['price'].replace("£", ""))
+            qty_val = int(items[0]['quantity'].replace("x ", ""))
 
             expected_total = f"£{product_price:.2f}"
 
             logger.info(f"Price: {price_val}, Quantity: {qty_val}, Total: {total_text}")
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_007(self, test_case: Dict):
+    def test_TC_002_007(self, test_case: CartCalculationCase):
         """DTT - Formula: Multi-Type, Total = Σ(Price × Qty)"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
-
-            for i in range(1, 11):
-                element = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{i}"]'))
-                )
-                product_name = element.get_attribute("data-name")
-                logger.info(f"Adding product {i} - {product_name} to cart")
-                element.click()
+            if not test_case.checkpoint:
+                self.add_products(test_case.product_ids)
 
-            self.driver.get(self.BASKET_URL)
-
-            items = self.driver.find_elements(By.CSS_SELECTOR, "#basketItems li.list-group-item.d-flex.justify-content-between.lh-condensed")
+            self.basket.open()
 
             calc_total = 0.0
-            for item in items:
-                qty_text = item.find_element(By.CSS_SELECTOR, "small.text-muted").text.strip().replace("x ", "")
-                price_text = item.find_element(By.CSS_SELECTOR, "span.text-muted").text.strip()
-                qty_val = int(qty_text)
-                price_val = float(price_text.replace("£", ""))
+            for item in self.basket.items():
+                qty_val = int(item['quantity'].replace("x ", ""))
+                price_val = float(item['price'].replace("£", ""))
                 calc_total += qty_val * price_val
                 logger.info(f"Item: qty={qty_val}, price={price_val}")
 
-            total_text = self.get_total_from_basket()
+            total_text = self.basket.total()
             expected_total = f"£{calc_total:.2f}"
 
             logger.info(f"Calculated total: {expected_total}, Displayed total: {total_text}")
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_008(self, test_case: Dict):
+    def test_TC_002_008(self, test_case: CartCalculationCase):
         """Use-Case - Delete item: Total price updates correctly"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
-
-            for i in range(1, 4):
-                element = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{i}"]'))
-                )
-                product_name = element.get_attribute("data-name")
-                logger.info(f"Adding product {product_name} (id={i}) to cart")
-                element.click()
+            if not test_case.checkpoint:
+                self.add_products(test_case.product_ids)
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            total_before_text = self.get_total_from_basket()
+            total_before_text = self.basket.total()
             total_before_val = float(total_before_text.replace("£", ""))
             logger.info(f"Total before delete: {total_before_val}")
 
-            basket_items = self.driver.find_elements(By.CSS_SELECTOR, "#basketItems li.list-group-item.d-flex.justify-content-between.lh-condensed")
-            target_item = None
-            for item in basket_items:
-                name = item.find_element(By.CSS_SELECTOR, "h6.my-0").text.strip()
-                if name == "Sherbet Discs":
-                    target_item = item
-                    break
+            target_item = next((item for item in self.basket.items() if item['name'] == "Sherbet Discs"), None)
 
             assert target_item is not None, "FAIL: Sherbet Discs not found in cart"
 
-            qty_text = target_item.find_element(By.CSS_SELECTOR, "small.text-muted").text.strip().replace("x ", "")
-            price_text = target_item.find_element(By.CSS_SELECTOR, "span.text-muted").text.strip()
-            qty_val = int(qty_text)
-            price_val = float(price_text.replace("£", ""))
+            qty_val = int(target_item['quantity'].replace("x ", ""))
+            price_val = float(target_item['price'].replace("£", ""))
             logger.info(f"Sherbet Discs: qty={qty_val}, price={price_val}")
 
-            delete_link = target_item.find_element(By.CSS_SELECTOR, "a.small")
-            delete_link.click()
-
-            alert = WebDriverWait(self.driver, 10).until(EC.alert_is_present())
-            alert.accept()
+            # The measured latency includes the confirm dialog round-trip
+            with self.track_latency("total_update", By.XPATH, self.TOTAL_XPATH):
+                self.basket.delete_item("Sherbet Discs")
+                alert = WebDriverWait(self.driver, 10).until(EC.alert_is_present())
+                alert.accept()
 
-            total_after_text = self.get_total_from_basket()
+            total_after_text = self.basket.total()
             total_after_val = float(total_after_text.replace("£", ""))
             logger.info(f"Total after delete: {total_after_val}")
 
@@ -419,135 +365,262 @@ class CartCalculationTest:
 
             assert round(total_after_val, 2) == expected_total, f"FAIL: Total after delete = {total_after_val}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def test_TC_002_009(self, test_case: Dict):
+    def test_TC_002_009(self, test_case: CartCalculationCase):
         """Use-Case - Standard Shipping: Add shipping fee"""
-        logger.info(f"Running {test_case['TestID']}: {test_case['Description']}")
+        logger.info(f"Running {test_case.test_id}: {test_case.description}")
 
         try:
-            self.driver.get(self.BASE_URL)
+            self.sweets.open()
 
-            product_id = test_case['Product_IDs']
-            element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-id="{product_id}"]'))
-            )
-            element.click()
+            self.sweets.click_product(test_case.product_ids[0])
 
-            self.driver.get(self.BASKET_URL)
+            self.basket.open()
 
-            shipping_option = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, '//label[contains(text(),"Standard Shipping (£1.99)")]'))
-            )
-            shipping_option.click()
+            if test_case.shipping:
+                logger.info("Selecting standard shipping")
+                with self.track_latency("total_update", By.XPATH, self.TOTAL_XPATH):
+                    self.basket.choose_shipping()
 
-            total_text = self.get_total_from_basket()
-            logger.info(f"Total with shipping: {total_text}")
+            total_text = self.basket.total()
+            logger.info(f"Total displayed: {total_text}")
 
-            expected_total = test_case['Expected_Total']
+            expected_total = test_case.expected_total
             assert total_text == expected_total, f"FAIL: Total = {total_text}, expected = {expected_total}"
 
-            logger.info(f"PASS: {test_case['TestID']}")
+            logger.info(f"PASS: {test_case.test_id}")
             return "PASS"
 
         except AssertionError as e:
-            logger.error(f"FAIL: {test_case['TestID']} - {str(e)}")
+            logger.error(f"FAIL: {test_case.test_id} - {str(e)}")
             return "FAIL"
         except Exception as e:
-            logger.error(f"ERROR: {test_case['TestID']} - {str(e)}")
+            logger.error(f"ERROR: {test_case.test_id} - {str(e)}")
             return "ERROR"
 
-    def run_all_tests(self):
-        """Run all test cases from CSV"""
-        test_data = self.load_test_data()
-
-        print("=" * 80)
-        print("CART CALCULATION - TEST EXECUTION")
-        print("=" * 80)
-
-        for test_case in test_data:
-            test_id = test_case['TestID']
-
-            self.clear_cart()
-
-            test_method_name = f"test_{test_id}"
-            test_method = getattr(self, test_method_name, None)
+    SEED_SCRIPT = """
+        const [ids, quantity] = arguments;
+        for (const id of ids) {
+            const button = document.querySelector(`[data-id="${id}"]`);
+            if (!button) throw new Error('Product not found: ' + id);
+            for (let i = 0; i < quantity; i++) button.click();
+        }
+    """
+
+    EMPTY_BASKET_SCRIPT = """
+        window.confirm = () => true;
+        emptyBasket();
+    """
+
+    # Installed on every new document, records when #basketItems last changed
+    RENDER_OBSERVER_SCRIPT = """
+        const state = window.__basketRender = {lastChange: null};
+        new MutationObserver(mutations => {
+            const inBasket = mutations.some(m => m.target.nodeType === 1 && m.target.closest('#basketItems'));
+            if (inBasket) state.lastChange = performance.now();
+        }).observe(document, {subtree: true, childList: true, characterData: true});
+    """
+
+    BASKET_METRICS_SCRIPT = """
+        const [expected] = arguments;
+        const nav = performance.getEntriesByType('navigation')[0];
+        const state = window.__basketRender;
+        const lines = Math.max(document.querySelectorAll('#basketItems li').length - 1, 0);
+        const ready = lines === expected && nav && state && state.lastChange !== null;
+        return {lines: lines, render: ready ? state.lastChange - nav.responseEnd : null};
+    """
+
+    def seed_cart(self, product_ids: List[int], quantity: int):
+        """Add every product quantity times in a single script call on the sweets page"""
+        self.helper.execute_script(self.SEED_SCRIPT, product_ids, quantity)
+
+    def measure_basket_render(self, lines: int, timeout: float = 10) -> Dict:
+        """Wait until the basket shows the expected lines and time the render from responseEnd"""
+        metrics = {}
+
+        def rendered(driver):
+            metrics.update(self.helper.execute_script(self.BASKET_METRICS_SCRIPT, lines))
+            return metrics['render'] is not None
 
-            if test_method:
-                result = test_method(test_case)
-            else:
-                logger.warning(f"Test method {test_method_name} not found")
-                result = "SKIP"
-
-            self.test_results.append({
-                'TestID': test_id,
-                'Description': test_case['Description'],
-                'Expected': test_case['Expected_Result'],
-                'Actual': result,
-                'Status': 'PASS' if result == test_case['Expected_Result'] else 'FAIL'
-            })
-
-            print("-" * 80)
-
-        self.print_summary()
+        try:
+            with self.helper.unrecorded():
+                WebDriverWait(self.driver, timeout).until(rendered)
+        except TimeoutException:
+            logger.warning(f"Basket did not render {lines} lines within {timeout}s")
+        return metrics
+
+    def measure_total_update(self, timeout: float = 5):
+        """Time the basket total recompute after selecting standard shipping"""
+        with self.helper.unrecorded():
+            self.helper.execute_script(PerformanceCollector.ARM_LATENCY_SCRIPT, 'xpath', self.TOTAL_XPATH)
+        self.basket.choose_shipping()
+        try:
+            return PerformanceCollector.wait_for_latency(self.helper, timeout)
+        except TimeoutException:
+            logger.warning(f"Total did not update within {timeout}s")
+            return None
+
+    def run_stress_step(self, product_ids: List[int], quantity: int, cycles: int) -> Dict:
+        """Grow the cart to one point of the stress grid and measure the basket page"""
+        self.clear_cart()
+        self.helper.get(self.BASE_URL)
+
+        for _ in range(cycles):
+            self.seed_cart(product_ids, quantity)
+            self.helper.get(self.BASKET_URL)
+            self.helper.execute_script(self.EMPTY_BASKET_SCRIPT)
+            self.helper.get(self.BASE_URL)
+
+        self.seed_cart(product_ids, quantity)
+        self.helper.get(self.BASKET_URL)
+
+        basket = self.measure_basket_render(len(product_ids))
+        total_update = self.measure_total_update()
+
+        point = {
+            'Products': len(product_ids),
+            'Quantity': quantity,
+            'Cycles': cycles,
+            'Lines': basket['lines'],
+            'Units': len(product_ids) * quantity,
+            'Render_MS': round(basket['render'], 1) if basket['render'] is not None else None,
+            'Total_Update_MS': round(total_update, 1) if total_update is not None else None,
+            'JS_Heap_MB': round(self.monitor.js_heap_mb(), 1),
+            'Total': self.basket.total()
+        }
+        logger.info(f"Stress {point['Products']} products x{quantity}, {cycles} cycles: "
+                    f"render={point['Render_MS']}ms, total update={point['Total_Update_MS']}ms, "
+                    f"heap={point['JS_Heap_MB']}MB")
+        return point
+
+    @staticmethod
+    def scaling_exponent(points: List[Dict], size_key: str, value_key: str) -> float:
+        """Least-squares slope of log(value) against log(size), 1.0 means linear"""
+        pairs = [(math.log(p[size_key]), math.log(p[value_key]))
+                 for p in points if p[size_key] > 0 and p[value_key]]
+        if len(set(x for x, _ in pairs)) < 2:
+            return None
+        mean_x = statistics.mean(x for x, _ in pairs)
+        mean_y = statistics.mean(y for _, y in pairs)
+        num = sum((x - mean_x) * (y - mean_y) for x, y in pairs)
+        den = sum((x - mean_x) ** 2 for x, _ in pairs)
+        return num / den
+
+    def run_stress(self, product_counts: List[int], quantities: List[int], cycle_counts: List[int]):
+        """Grow the cart along the configured axes and report how the basket page scales"""
+        catalog = sorted(self.sweets.open().products())
 
-    def print_summary(self):
-        """Print test execution summary"""
-        print("\n" + "=" * 80)
-        print("TEST EXECUTION SUMMARY")
         print("=" * 80)
-
-        for result in self.test_results:
-            status_symbol = "✓" if result['Status'] == 'PASS' else "✗"
-            print(f"{status_symbol} {result['TestID']}: {result['Description']}")
-            print(f"  Expected: {result['Expected']} | Actual: {result['Actual']} | Status: {result['Status']}")
-
-        total = len(self.test_results)
-        passed = sum(1 for r in self.test_results if r['Status'] == 'PASS')
-        failed = total - passed
-
+        print("CART CALCULATION - STRESS MODE")
         print("=" * 80)
-        print(f"Total: {total} | Passed: {passed} | Failed: {failed}")
-        print(f"Pass Rate: {(passed/total*100):.2f}%")
+
+        # Every document loaded from here on records when its basket list last changed
+        observer = self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                                               {'source': self.RENDER_OBSERVER_SCRIPT})
+        points = []
+        try:
+            for count in product_counts:
+                if count > len(catalog):
+                    logger.warning(f"Only {len(catalog)} products available, capping {count}")
+                    count = len(catalog)
+                for quantity in quantities:
+                    for cycles in cycle_counts:
+                        points.append(self.run_stress_step(catalog[:count], quantity, cycles))
+        finally:
+            self.driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument",
+                                        {'identifier': observer['identifier']})
+
+        print(f"{'Products':>8} {'Qty':>6} {'Cycles':>6} {'Lines':>6} {'Units':>7} "
+              f"{'Render ms':>10} {'Update ms':>10} {'Heap MB':>8}  Total")
+        for p in points:
+            print(f"{p['Products']:>8} {p['Quantity']:>6} {p['Cycles']:>6} {p['Lines']:>6} {p['Units']:>7} "
+                  f"{str(p['Render_MS']):>10} {str(p['Total_Update_MS']):>10} {p['JS_Heap_MB']:>8}  {p['Total']}")
+
+        print("-" * 80)
+        for size_key in ('Lines', 'Units'):
+            for value_key in ('Render_MS', 'Total_Update_MS'):
+                exponent = self.scaling_exponent(points, size_key, value_key)
+                if exponent is None:
+                    continue
+                warning = "  <-- super-linear, check for O(n^2) work" if exponent > 1.5 else ""
+                print(f"{value_key} vs {size_key}: ~n^{exponent:.2f}{warning}")
         print("=" * 80)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_file = f"test_report_{timestamp}.txt"
-
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write("CART CALCULATION - TEST EXECUTION REPORT\n")
-            f.write("=" * 80 + "\n\n")
-            for result in self.test_results:
-                f.write(f"{result['TestID']}: {result['Description']}\n")
-                f.write(f"Expected: {result['Expected']} | Actual: {result['Actual']} | Status: {result['Status']}\n\n")
-            f.write("=" * 80 + "\n")
-            f.write(f"Total: {total} | Passed: {passed} | Failed: {failed}\n")
-            f.write(f"Pass Rate: {(passed/total*100):.2f}%\n")
-
-        logger.info(f"Test report saved to {report_file}")
+        report_file = f"stress_report_{timestamp}.csv"
+        with open(report_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(points[0].keys()))
+            writer.writeheader()
+            writer.writerows(points)
+
+        logger.info(f"Stress report saved to {report_file}")
+        self.clear_cart()
+        return points
+
+    def plan_test(self, test_case: CartCalculationCase, checkpoints: set) -> Counter:
+        """Estimate the WebDriver operations the test method of one row issues"""
+        ops = Counter()
+        method = test_case.test_id
+        # Reading the basket total is one lookup per page state, and so is finding the product buttons
+        total = Counter(script=1)
+        buttons = Counter(script=1)
+        products = len(test_case.product_ids)
+
+        if method == 'TC_002_001':
+            ops += Counter(page_load=1) + total
+        elif method in ('TC_002_002', 'TC_002_006'):
+            ops += Counter(page_load=2, click=1) + buttons + total
+        elif method in ('TC_002_003', 'TC_002_004', 'TC_002_005'):
+            ops += Counter(page_load=2, click=sum(test_case.quantities)) + buttons + total
+        elif method in ('TC_002_007', 'TC_002_008'):
+            if test_case.checkpoint:
+                ops += self.plan_checkpoint(test_case.checkpoint, checkpoints)
+            else:
+                ops += self.plan_add_products(products)
+            # Basket lines and total come from one lookup
+            ops += Counter(page_load=1, script=1)
+            if method == 'TC_002_008':
+                ops += Counter(click=1, wait=1) + total
+        elif method == 'TC_002_009':
+            shipping = int(test_case.shipping)
+            # Choosing shipping needs a lookup and re-renders the total
+            ops += Counter(page_load=2, click=1 + shipping, script=shipping) + buttons + total
+        return ops
+
+    def run_mode(self, args) -> bool:
+        """Run the stress mode when it was selected on the command line"""
+        if not args.stress:
+            return False
+        self.setup()
+        self.run_stress(
+            [int(v) for v in args.stress_products.split(',')],
+            [int(v) for v in args.stress_quantities.split(',')],
+            [int(v) for v in args.stress_cycles.split(',')]
+        )
+        return True
 
 
 def main():
     """Main function to run tests"""
-    test = CartCalculationTest()
-
-    try:
-        test.setup()
-        test.run_all_tests()
-    except Exception as e:
-        logger.error(f"Test execution failed: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        test.teardown()
+    parser = build_parser(CartCalculationTest)
+    parser.add_argument("--stress", action="store_true",
+                        help="Grow the cart along the stress axes and report scaling curves")
+    parser.add_argument("--stress-products", default="1,2,4,8,16",
+                        help="Comma-separated distinct product counts")
+    parser.add_argument("--stress-quantities", default="1,10,100",
+                        help="Comma-separated quantities per line")
+    parser.add_argument("--stress-cycles", default="0",
+                        help="Comma-separated add/empty cycles run before the measured fill")
+    run(CartCalculationTest, parser)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,2045 @@
+#
+# File: common.py
+# Author: TiDz
+# Contact: nguyentinvs123@gmail.com
+# Created on Mon Oct 19 2026
+# Description: Browser helpers, logging, data parsing and the runner shared by the feature tests
+# Useage: imported by Feature_*/test_*.py
+#
+
+
+import argparse
+import ast
+import contextlib
+import csv
+import gzip
+import hashlib
+import heapq
+import importlib.util
+import json
+import os
+import queue
+import re
+import statistics
+import sys
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from collections import Counter
+from datetime import datetime
+from html.parser import HTMLParser
+from time import sleep
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import psutil
+import websocket
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+import logging
+import logging.handlers
+
+logger = logging.getLogger(__name__)
+
+
+class LogContext(logging.Filter):
+    """Attach the current TestID, worker and step to every log record"""
+
+    def __init__(self):
+        super().__init__()
+        self.test_id = "-"
+        self.worker = str(os.getpid())
+        self.step = "setup"
+
+    def filter(self, record):
+        # Buffered records pass again when flushed, keep the context they were logged with
+        if not hasattr(record, 'test_id'):
+            record.test_id = self.test_id
+            record.worker = self.worker
+            record.step = self.step
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a log record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'TestID': getattr(record, 'test_id', '-'),
+            'worker': getattr(record, 'worker', '-'),
+            'step': getattr(record, 'step', '-'),
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RowBuffer(logging.Handler):
+    """Keep the debug records of the current row in memory until the row finishes"""
+
+    def __init__(self, target: logging.Handler):
+        super().__init__(logging.DEBUG)
+        self.target = target
+        self.records = []
+
+    def emit(self, record):
+        if record.levelno <= logging.DEBUG:
+            self.records.append(record)
+
+    def flush_row(self, failed: bool):
+        """Send the buffered records on only if the row failed, then drop them"""
+        if failed:
+            for record in self.records:
+                self.target.handle(record)
+        self.records = []
+
+
+log_context = LogContext()
+
+
+def setup_logging(json_path: str = None, debug_loggers: Tuple[str, ...] = ()):
+    """Route log records through a queue to background console and JSON file handlers"""
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - [%(test_id)s] %(message)s'))
+    handlers = [console]
+    if json_path:
+        json_file = logging.FileHandler(json_path, encoding='utf-8')
+        json_file.setFormatter(JsonFormatter())
+        handlers.append(json_file)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+
+    # QueueHandler.prepare formats the message on the calling thread, only handler I/O runs on
+    # the listener thread. Debug records are buffered unformatted, so they cost little until a row fails.
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setLevel(logging.INFO)
+    queue_handler.addFilter(log_context)
+    row_buffer = RowBuffer(queue_handler)
+    row_buffer.addFilter(log_context)
+
+    # Third-party loggers such as selenium and urllib3 stay at INFO, only our own debug records are built
+    root = logging.getLogger()
+    root.handlers = [queue_handler, row_buffer]
+    root.setLevel(logging.INFO)
+    for name in (__name__,) + tuple(debug_loggers):
+        logging.getLogger(name).setLevel(logging.DEBUG)
+
+    listener.start()
+    return listener, row_buffer
+
+
+class SeleniumHelper:
+    """Helper class for Selenium operations"""
+
+    def __init__(self, headless: bool = False, backend: str = "webdriver"):
+        self.driver = None
+        self.headless = headless
+        self.backend = backend
+        self.cdp = None
+        self.perf = None
+        self.recorder = None
+        # Bumped on every navigation and new session so page objects drop cached handles
+        self.page_loads = 0
+
+    def start_driver(self):
+        """Start Chrome WebDriver"""
+        options = ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+            options.add_argument("--disable-gpu")
+
+        options.add_argument("--log-level=3")
+        options.add_experimental_option("excludeSwitches", ["enable-logging"])
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+
+        self.driver = webdriver.Chrome(options=options)
+        self.page_loads += 1
+        if self.recorder:
+            self.recorder.attach(self.driver)
+        self.driver.implicitly_wait(10)
+        self.driver.set_page_load_timeout(30)
+        self.driver.maximize_window()
+        logger.info("WebDriver started successfully")
+
+        if self.backend == "cdp":
+            if self.recorder:
+                logger.warning("Commands sent through the CDP backend are not recorded")
+            try:
+                self.cdp = CDPSession.attach(self.driver)
+                logger.info("CDP session attached")
+            except Exception as e:
+                logger.warning(f"CDP backend unavailable, using WebDriver only: {e}")
+                self.cdp = None
+        return self.driver
+
+    def quit_driver(self):
+        """Quit WebDriver"""
+        if self.cdp:
+            self.cdp.close()
+            self.cdp = None
+        if self.driver:
+            try:
+                self.driver.quit()
+                logger.info("WebDriver closed")
+            except Exception as e:
+                logger.error(f"Error closing WebDriver: {e}")
+
+    def get(self, url: str):
+        """Navigate to a URL, through CDP when the CDP backend is active"""
+        if self.cdp:
+            try:
+                self.cdp.navigate(url)
+            except Exception as e:
+                logger.warning(f"CDP navigation failed, falling back to WebDriver: {e}")
+                self.driver.get(url)
+        else:
+            self.driver.get(url)
+        self.page_loads += 1
+
+        if self.perf:
+            self.perf.capture_navigation(url)
+
+    def click(self, selector: str, element=None, by: str = By.CSS_SELECTOR):
+        """Click an element, by selector through CDP when the CDP backend is active"""
+        if self.cdp:
+            try:
+                self.cdp.click(selector, by)
+                return
+            except ClickDispatched:
+                # The page may already have handled the click, a second one would add twice
+                raise
+            except Exception as e:
+                logger.warning(f"CDP click failed, falling back to WebDriver: {e}")
+        if element is None:
+            element = self.driver.find_element(by, selector)
+        element.click()
+
+    def execute_script(self, script: str, *args):
+        """Run a script, through CDP when none of its arguments is an element"""
+        if self.cdp and not any(isinstance(arg, WebElement) for arg in args):
+            try:
+                return self.cdp.evaluate(f"(function() {{ {script} }}).apply(null, {json.dumps(args)})")
+            except Exception as e:
+                logger.warning(f"CDP evaluate failed, falling back to WebDriver: {e}")
+        return self.driver.execute_script(script, *args)
+
+    def unrecorded(self):
+        """Keep sampling commands, whose results change on every run, out of the recorded trace"""
+        return self.recorder.pause() if self.recorder else contextlib.nullcontext()
+
+    def clear_storage(self):
+        """Clear browser storage"""
+        if self.driver:
+            try:
+                if self.cdp:
+                    self.cdp.clear_storage()
+                else:
+                    self.driver.execute_script("window.localStorage.clear();")
+                    self.driver.execute_script("window.sessionStorage.clear();")
+                    self.driver.delete_all_cookies()
+                logger.info("Storage cleared")
+            except Exception as e:
+                logger.error(f"Error clearing storage: {e}")
+
+    SNAPSHOT_SCRIPT = """
+        const dump = storage => Object.fromEntries(
+            Object.keys(storage).map(key => [key, storage.getItem(key)])
+        );
+        return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+    """
+
+    RESTORE_SCRIPT = """
+        const [snapshot] = arguments;
+        window.localStorage.clear();
+        window.sessionStorage.clear();
+        Object.entries(snapshot.local).forEach(([key, value]) => window.localStorage.setItem(key, value));
+        Object.entries(snapshot.session).forEach(([key, value]) => window.sessionStorage.setItem(key, value));
+    """
+
+    def snapshot_storage(self) -> Dict:
+        """Capture storage and cookies of the origin currently loaded"""
+        snapshot = self.execute_script(self.SNAPSHOT_SCRIPT)
+        snapshot['cookies'] = self.driver.get_cookies()
+        return snapshot
+
+    def restore_storage(self, snapshot: Dict):
+        """Replace storage and cookies of the origin currently loaded with a snapshot"""
+        self.execute_script(self.RESTORE_SCRIPT, snapshot)
+        self.driver.delete_all_cookies()
+        for cookie in snapshot['cookies']:
+            self.driver.add_cookie(cookie)
+
+    def restart_driver(self):
+        """Quit the current session and start a fresh one"""
+        self.quit_driver()
+        self.driver = None
+        return self.start_driver()
+
+
+class PageObject:
+    """Elements of one page resolved in a single script call and cached until the next navigation"""
+
+    LOOKUP_SCRIPT = None
+
+    def __init__(self, helper: SeleniumHelper, url: str):
+        self.helper = helper
+        self.url = url
+        self.cache = None
+        self.cached_at = None
+
+    def open(self):
+        """Navigate to the page, which invalidates handles cached for the previous load"""
+        self.helper.get(self.url)
+        return self
+
+    def index(self, found):
+        """Shape the raw lookup result, called once per page load"""
+        return found
+
+    def lookup(self):
+        """Return the handles of the current page load, resolving them on first use"""
+        if self.cache is None or self.cached_at != self.helper.page_loads:
+            # The script returns null until the page has rendered, so the wait polls it
+            found = WebDriverWait(self.helper.driver, 10).until(
+                lambda d: d.execute_script(self.LOOKUP_SCRIPT, *self.script_args())
+            )
+            self.cache = self.index(found)
+            self.cached_at = self.helper.page_loads
+        return self.cache
+
+    def script_args(self) -> Tuple:
+        """Arguments passed to the lookup script"""
+        return ()
+
+    def invalidate(self):
+        """Drop cached handles after an action that re-renders the page in place"""
+        self.cache = None
+
+    def retry_stale(self, action):
+        """Run an action on the cached handles, resolving them again once if they went stale"""
+        try:
+            return action(self.lookup())
+        except StaleElementReferenceException:
+            logger.debug("Stale handles on %s, resolving them again", self.url)
+            self.invalidate()
+            return action(self.lookup())
+
+
+class SweetsPage(PageObject):
+    """Product list with every add button resolved in one lookup"""
+
+    LOOKUP_SCRIPT = """
+        const buttons = Array.from(document.querySelectorAll('[data-id]'));
+        if (!buttons.length) return null;
+        return buttons.map(button => ({
+            id: parseInt(button.dataset.id, 10),
+            name: button.dataset.name,
+            price: button.dataset.price,
+            element: button
+        }));
+    """
+
+    def index(self, found) -> Dict[int, Dict]:
+        return {product['id']: product for product in found}
+
+    def products(self) -> Dict[int, Dict]:
+        """Product id to name, price and button handle"""
+        return self.lookup()
+
+    def click_product(self, product_id: int) -> Dict:
+        """Click the add button of a product once and return its details"""
+        def click(products):
+            if product_id not in products:
+                raise ValueError(f"Product {product_id} is not listed on {self.url}")
+            product = products[product_id]
+            self.helper.click(f'[data-id="{product_id}"]', product['element'])
+            return product
+        return self.retry_stale(click)
+
+
+class BasketPage(PageObject):
+    """Basket lines, total and actions resolved in one lookup"""
+
+    TOTAL_XPATH = '//li/span[text()="Total (GBP)"]/following-sibling::strong'
+    SHIPPING_XPATH = '//label[contains(text(),"Standard Shipping (£1.99)")]'
+    EMPTY_SELECTOR = '[onclick="emptyBasket();"]'
+
+    LOOKUP_SCRIPT = """
+        const [totalXpath, shippingXpath, emptySelector] = arguments;
+        const byXpath = xpath => document.evaluate(xpath, document, null,
+                                                   XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const list = document.getElementById('basketItems');
+        const total = byXpath(totalXpath);
+        if (!list || !total) return null;
+        const text = (item, selector) => {
+            const element = item.querySelector(selector);
+            return element ? element.textContent.trim() : null;
+        };
+        return {
+            count: Math.max(list.querySelectorAll('li').length - 1, 0),
+            items: Array.from(list.querySelectorAll('li.list-group-item.d-flex.justify-content-between.lh-condensed'))
+                .map(item => ({
+                    name: text(item, 'h6.my-0'),
+                    quantity: text(item, 'small.text-muted'),
+                    price: text(item, 'span.text-muted'),
+                    line: Array.from(list.children).indexOf(item) + 1,
+                    delete: item.querySelector('a.small')
+                })),
+            total: total.textContent.trim(),
+            shipping: byXpath(shippingXpath),
+            empty: document.querySelector(emptySelector)
+        };
+    """
+
+    def script_args(self) -> Tuple:
+        return (self.TOTAL_XPATH, self.SHIPPING_XPATH, self.EMPTY_SELECTOR)
+
+    def count(self) -> int:
+        """Number of basket rows, excluding the total row"""
+        return self.lookup()['count']
+
+    def items(self) -> List[Dict]:
+        """Name, quantity and price text of each basket line"""
+        return self.lookup()['items']
+
+    def total(self) -> str:
+        """Total text as rendered after the last load or basket action"""
+        return self.lookup()['total']
+
+    def delete_item(self, name: str):
+        """Click the delete link of the first line with the given product name"""
+        def delete(basket):
+            item = next((item for item in basket['items'] if item['name'] == name), None)
+            if item is None:
+                raise ValueError(f"{name} is not in the basket")
+            self.helper.click(f"#basketItems > li:nth-child({item['line']}) a.small", item['delete'])
+        self.retry_stale(delete)
+        self.invalidate()
+
+    def empty(self):
+        """Click the empty basket button"""
+        self.retry_stale(lambda basket: self.helper.click(self.EMPTY_SELECTOR, basket['empty']))
+        self.invalidate()
+
+    def choose_shipping(self):
+        """Select standard shipping, which recomputes the total in place"""
+        def choose(basket):
+            if basket['shipping'] is None:
+                raise ValueError(f"No standard shipping option on {self.url}")
+            self.helper.click(self.SHIPPING_XPATH, basket['shipping'], By.XPATH)
+        self.retry_stale(choose)
+        self.invalidate()
+
+
+class ClickDispatched(RuntimeError):
+    """A CDP click failed after its mouse events reached the page, so it must not be retried"""
+
+
+class CDPSession:
+    """Persistent DevTools WebSocket connection to the page driven by WebDriver"""
+
+    def __init__(self, ws_url: str, timeout: float = 30):
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True)
+        self.timeout = timeout
+        self._next_id = 0
+        self._page_events_enabled = False
+        self._loaded = set()
+
+    @classmethod
+    def attach(cls, driver):
+        """Connect to the DevTools target behind the current WebDriver window"""
+        address = driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+        if not address:
+            raise RuntimeError("Chrome did not expose a debugger address")
+
+        with urllib.request.urlopen(f"http://{address}/json") as response:
+            targets = [t for t in json.load(response) if t.get('type') == 'page']
+        if not targets:
+            raise RuntimeError("No DevTools page target found")
+
+        # chromedriver uses the DevTools target id as the window handle
+        handle = driver.current_window_handle
+        target = next((t for t in targets if t['id'] == handle), targets[0])
+        return cls(target['webSocketDebuggerUrl'])
+
+    def close(self):
+        """Close the WebSocket connection"""
+        try:
+            self.ws.close()
+        except Exception as e:
+            logger.error(f"Error closing CDP session: {e}")
+
+    def send(self, method: str, params: Dict = None, stop_on_dialog: bool = False) -> Optional[Dict]:
+        """Send one DevTools command and wait for its response, None if it opened a dialog first"""
+        self._next_id += 1
+        command_id = self._next_id
+        self.ws.send(json.dumps({'id': command_id, 'method': method, 'params': params or {}}))
+
+        while True:
+            message = json.loads(self.ws.recv())
+            # Events and stale responses share the socket
+            if message.get('id') != command_id:
+                self.handle_event(message)
+                # confirm() holds the response back until the dialog is closed, which the caller does
+                if stop_on_dialog and message.get('method') == "Page.javascriptDialogOpening":
+                    return None
+                continue
+            if 'error' in message:
+                raise RuntimeError(f"{method} failed: {message['error'].get('message')}")
+            return message.get('result', {})
+
+    def evaluate(self, expression: str):
+        """Evaluate a JS expression in the page and return its value"""
+        result = self.send("Runtime.evaluate", {
+            'expression': expression,
+            'returnByValue': True,
+            'awaitPromise': True
+        })
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            message = details.get('exception', {}).get('description') or details.get('text')
+            raise RuntimeError(f"Script error: {message}")
+        return result.get('result', {}).get('value')
+
+    def handle_event(self, message: Dict):
+        """Remember which documents fired their load event"""
+        if message.get('method') == "Page.lifecycleEvent" and message['params'].get('name') == "load":
+            self._loaded.add(message['params'].get('loaderId'))
+
+    def enable_page_events(self):
+        """Subscribe to the load and dialog events of the page, once per session"""
+        if not self._page_events_enabled:
+            self.send("Page.enable")
+            self.send("Page.setLifecycleEventsEnabled", {'enabled': True})
+            self._page_events_enabled = True
+
+    def navigate(self, url: str):
+        """Navigate the page and wait for the load event of the document it creates"""
+        self.enable_page_events()
+
+        self._loaded = set()
+        result = self.send("Page.navigate", {'url': url})
+        if result.get('errorText'):
+            raise RuntimeError(f"Navigation to {url} failed: {result['errorText']}")
+
+        # Same-document navigations have no loader, there is nothing to wait for
+        loader_id = result.get('loaderId')
+        if not loader_id:
+            return
+
+        # Waiting on this loader ignores the old document, even when the URL does not change
+        deadline = time.monotonic() + self.timeout
+        try:
+            while loader_id not in self._loaded:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Page load timed out: {url}")
+                self.ws.settimeout(remaining)
+                self.handle_event(json.loads(self.ws.recv()))
+        except websocket.WebSocketTimeoutException:
+            raise TimeoutError(f"Page load timed out: {url}") from None
+        finally:
+            self.ws.settimeout(self.timeout)
+
+    BOX_SCRIPT = """
+        (function(kind, selector) {
+            const el = kind === 'xpath'
+                ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+                : document.querySelector(selector);
+            if (!el) throw new Error('No element matches ' + selector);
+            let rect = el.getBoundingClientRect();
+            if (rect.top < 0 || rect.left < 0 || rect.bottom > innerHeight || rect.right > innerWidth) {
+                el.scrollIntoView({block: 'center', inline: 'center'});
+                rect = el.getBoundingClientRect();
+            }
+            const x = rect.left + rect.width / 2;
+            const y = rect.top + rect.height / 2;
+            const hit = document.elementFromPoint(x, y);
+            return {x: x, y: y, visible: rect.width > 0 && rect.height > 0,
+                    obscured: !hit || !(hit === el || el.contains(hit))};
+        })(%s, %s)
+    """
+
+    def click(self, selector: str, by: str = By.CSS_SELECTOR):
+        """Click the centre of an element with real mouse events, after the checks WebDriver makes"""
+        kind = 'xpath' if by == By.XPATH else 'css'
+        box = self.evaluate(self.BOX_SCRIPT % (json.dumps(kind), json.dumps(selector)))
+        if not box['visible']:
+            raise RuntimeError(f"Element is not visible: {selector}")
+        if box['obscured']:
+            raise RuntimeError(f"Element would not receive the click: {selector}")
+
+        self.enable_page_events()
+        pressed = False
+        try:
+            for event in ("mouseMoved", "mousePressed", "mouseReleased"):
+                pressed = pressed or event == "mousePressed"
+                result = self.send("Input.dispatchMouseEvent", {
+                    'type': event,
+                    'x': box['x'],
+                    'y': box['y'],
+                    'button': 'left' if event != "mouseMoved" else 'none',
+                    'clickCount': 1 if event != "mouseMoved" else 0
+                }, stop_on_dialog=True)
+                if result is None:
+                    # The page is blocked on confirm() or alert() until the test handles the dialog
+                    logger.debug("Click on %s opened a dialog", selector)
+                    return
+        except Exception as e:
+            if pressed:
+                raise ClickDispatched(f"Click on {selector} failed after the mouse button was pressed: {e}") from e
+            raise
+
+    def clear_storage(self):
+        """Clear local storage, session storage and cookies"""
+        self.evaluate("window.localStorage.clear(); window.sessionStorage.clear();")
+        self.send("Network.clearBrowserCookies")
+
+
+class PerformanceCollector:
+    """Collect page timings for the current row and check them against per-page budgets"""
+
+    NAVIGATION_SCRIPT = """
+        const nav = performance.getEntriesByType('navigation')[0];
+        if (!nav) return null;
+        const paints = {};
+        performance.getEntriesByType('paint').forEach(p => { paints[p.name] = p.startTime; });
+        return {
+            ttfb: nav.responseStart,
+            dom_content_loaded: nav.domContentLoadedEventEnd,
+            load: nav.loadEventEnd,
+            first_paint: paints['first-paint'] || 0,
+            first_contentful_paint: paints['first-contentful-paint'] || 0
+        };
+    """
+
+    ARM_LATENCY_SCRIPT = """
+        const [kind, selector] = arguments;
+        const read = () => {
+            const el = kind === 'xpath'
+                ? document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+                : document.querySelector(selector);
+            return el ? el.textContent : null;
+        };
+        const state = window.__perfLatency = {clickedAt: null, changedAt: null};
+        const before = read();
+        document.addEventListener('click', () => {
+            if (state.clickedAt === null) state.clickedAt = performance.now();
+        }, {capture: true, once: true});
+        const observer = new MutationObserver(() => {
+            if (state.clickedAt !== null && read() !== before) {
+                state.changedAt = performance.now();
+                observer.disconnect();
+            }
+        });
+        observer.observe(document.documentElement, {subtree: true, childList: true, characterData: true});
+    """
+
+    READ_LATENCY_SCRIPT = """
+        const state = window.__perfLatency;
+        return state && state.changedAt !== null ? state.changedAt - state.clickedAt : null;
+    """
+
+    def __init__(self, helper, budget_path: str):
+        self.helper = helper
+        self.budgets = self.load_budgets(budget_path)
+        self.current_page = None
+        self.samples = []
+
+    @staticmethod
+    def load_budgets(budget_path: str) -> Dict:
+        """Load per-page budgets in milliseconds keyed by (page, metric)"""
+        budgets = {}
+        with open(budget_path, 'r', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                budgets[(row['Page'], row['Metric'])] = float(row['Budget_MS'])
+        logger.info(f"Loaded {len(budgets)} performance budgets")
+        return budgets
+
+    @staticmethod
+    def page_name(url: str) -> str:
+        """Map a URL to the page name used in the budget file"""
+        return urllib.parse.urlparse(url).path.strip('/') or 'home'
+
+    def begin(self):
+        """Start collecting samples for a new row"""
+        self.samples = []
+
+    def record(self, metric: str, value: float):
+        """Record one timing for the current page"""
+        self.samples.append({'Page': self.current_page, 'Metric': metric, 'Value_MS': round(value, 1)})
+        logger.info(f"Perf {self.current_page}.{metric}: {value:.1f}ms")
+
+    def capture_navigation(self, url: str):
+        """Record Navigation Timing and paint metrics after a page load"""
+        self.current_page = self.page_name(url)
+        try:
+            with self.helper.unrecorded():
+                timings = self.helper.execute_script(self.NAVIGATION_SCRIPT)
+        except Exception as e:
+            logger.error(f"Error capturing navigation timing: {e}")
+            return
+        for metric, value in (timings or {}).items():
+            # Zero means the event has not happened yet when we sampled
+            if value:
+                self.record(metric, value)
+
+    @classmethod
+    def wait_for_latency(cls, helper, timeout: float) -> float:
+        """Wait for the armed observer to report, a 0ms update still counts as observed"""
+        def observed(driver):
+            latency = helper.execute_script(cls.READ_LATENCY_SCRIPT)
+            # Wrapped so that a latency of 0.0 is truthy for WebDriverWait
+            return (latency,) if latency is not None else False
+
+        with helper.unrecorded():
+            return WebDriverWait(helper.driver, timeout).until(observed)[0]
+
+    @contextlib.contextmanager
+    def track(self, metric: str, by: str, selector: str, timeout: float = 5):
+        """Measure the time from a click inside the block to the watched element changing"""
+        kind = 'xpath' if by == By.XPATH else 'css'
+        with self.helper.unrecorded():
+            self.helper.execute_script(self.ARM_LATENCY_SCRIPT, kind, selector)
+        yield
+        try:
+            self.record(metric, self.wait_for_latency(self.helper, timeout))
+        except TimeoutException:
+            logger.warning(f"No DOM update observed for {metric} within {timeout}s")
+
+    def violations(self) -> List[str]:
+        """Return the samples of the current row that exceed their budget"""
+        over = []
+        for sample in self.samples:
+            budget = self.budgets.get((sample['Page'], sample['Metric']))
+            if budget is not None and sample['Value_MS'] > budget:
+                over.append(f"{sample['Page']}.{sample['Metric']}={sample['Value_MS']:.0f}ms>{budget:.0f}ms")
+        return over
+
+
+class ShardPlan:
+    """Deterministic assignment of rows to one of several shards"""
+
+    def __init__(self, index: int, count: int, durations: Dict = None):
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        self.index = index
+        self.count = count
+        self.assignment = self.balance(durations or {}, count)
+
+    @staticmethod
+    def parse_spec(spec: str) -> Tuple[int, int]:
+        """Split an 'i/n' spec into shard index and shard count"""
+        match = re.fullmatch(r'(\d+)/(\d+)', spec.strip())
+        if not match:
+            raise ValueError(f"shard must look like i/n, e.g. 2/4, got '{spec}'")
+        index, count = int(match.group(1)), int(match.group(2))
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"shard index must be between 1 and n, got '{spec}'")
+        return index, count
+
+    @classmethod
+    def parse(cls, spec: str, durations_path: str = None):
+        """Build a plan from an 'i/n' spec and an optional results file with row durations"""
+        index, count = cls.parse_spec(spec)
+        durations = {}
+        if durations_path:
+            with open(durations_path, 'r', encoding='utf-8') as f:
+                for result in json.load(f)['results']:
+                    if result.get('Duration') is not None:
+                        durations[result['TestID']] = result['Duration']
+            logger.info(f"Loaded durations for {len(durations)} rows")
+        return cls(index, count, durations)
+
+    @staticmethod
+    def balance(durations: Dict, count: int) -> Dict:
+        """Assign the slowest rows first, each to the currently lightest shard"""
+        loads = [0.0] * count
+        assignment = {}
+        for test_id, duration in sorted(durations.items(), key=lambda item: (-item[1], item[0])):
+            shard = loads.index(min(loads))
+            assignment[test_id] = shard
+            loads[shard] += duration
+        return assignment
+
+    def includes(self, test_id: str) -> bool:
+        """Check whether a row belongs to this shard"""
+        # Rows without a known duration fall back to a stable hash
+        shard = self.assignment.get(test_id)
+        if shard is None:
+            shard = zlib.crc32(test_id.encode('utf-8')) % self.count
+        return shard == self.index - 1
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f304d0c6c4b"
+
+
+def encode_trace_value(value, max_chars: int = None):
+    """Turn a command parameter or response into plain JSON, shortening long strings if asked"""
+    if isinstance(value, WebElement):
+        return {ELEMENT_KEY: value.id}
+    if isinstance(value, dict):
+        return {key: encode_trace_value(item, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_trace_value(item, max_chars) for item in value]
+    if max_chars and isinstance(value, str) and len(value) > max_chars:
+        return {'sha1': hashlib.sha1(value.encode('utf-8')).hexdigest(), 'length': len(value)}
+    return value
+
+
+class CommandRecorder:
+    """Capture every WebDriver command a session issues, with timings and responses"""
+
+    # Session lifecycle is owned by the replayer, not the trace
+    SKIPPED_COMMANDS = ("newSession", "quit")
+    MAX_VALUE_CHARS = 2000
+
+    # WebDriver commands behind each operation counted by the dry-run planner
+    OP_COMMANDS = {
+        'page_load': ("get",),
+        'click': ("clickElement",),
+        'wait': ("findElement", "findElements", "isElementDisplayed", "isElementEnabled", "getAlertText"),
+        'script': ("w3cExecuteScript", "w3cExecuteScriptAsync", "getElementText", "getElementAttribute",
+                   "getElementProperty", "executeCdpCommand", "w3cAcceptAlert")
+    }
+
+    def __init__(self, trace_path: str):
+        self.trace_path = trace_path
+        self.entries = []
+        self.started = None
+        self.paused = 0
+
+    def attach(self, driver):
+        """Wrap driver.execute so every command, including element commands, is recorded"""
+        original = driver.execute
+        if self.started is None:
+            self.started = time.perf_counter()
+
+        def execute(driver_command, params=None):
+            if self.paused:
+                return original(driver_command, params)
+            started = time.perf_counter()
+            try:
+                response = original(driver_command, params)
+            except Exception as e:
+                self.record(driver_command, params, started, error=type(e).__name__)
+                raise
+            self.record(driver_command, params, started, value=(response or {}).get('value'))
+            return response
+
+        driver.execute = execute
+
+    @contextlib.contextmanager
+    def pause(self):
+        """Leave the commands issued inside the block out of the trace"""
+        self.paused += 1
+        try:
+            yield
+        finally:
+            self.paused -= 1
+
+    def record(self, command: str, params: Dict, started: float, value=None, error: str = None):
+        """Append one command to the trace"""
+        if command in self.SKIPPED_COMMANDS:
+            return
+        params = {key: item for key, item in (params or {}).items() if key != 'sessionId'}
+        self.entries.append({
+            'c': command,
+            'p': encode_trace_value(params),
+            'o': round(started - self.started, 4),
+            'd': round(time.perf_counter() - started, 4),
+            'v': encode_trace_value(value, self.MAX_VALUE_CHARS),
+            'e': error
+        })
+
+    def save(self):
+        """Write the trace as gzip-compressed JSON lines"""
+        with gzip.open(self.trace_path, 'wt', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n")
+        logger.info(f"Recorded {len(self.entries)} WebDriver commands to {self.trace_path}")
+
+        latencies_path = self.latencies_path(self.trace_path)
+        with open(latencies_path, 'w', encoding='utf-8') as f:
+            json.dump(self.op_latencies(self.entries), f, indent=2)
+        logger.info(f"Measured operation latencies saved to {latencies_path}, usable with --latencies")
+
+    @staticmethod
+    def latencies_path(trace_path: str) -> str:
+        """Latencies file written next to a trace, run.jsonl.gz -> run.latencies.json"""
+        base = trace_path[:-len('.jsonl.gz')] if trace_path.endswith('.jsonl.gz') else trace_path
+        return f"{base}.latencies.json"
+
+    @classmethod
+    def op_latencies(cls, entries: List[Dict]) -> Dict[str, float]:
+        """Median seconds per planner operation over the successful commands of a trace"""
+        latencies = {}
+        for op, commands in cls.OP_COMMANDS.items():
+            durations = [entry['d'] for entry in entries if entry['c'] in commands and not entry['e']]
+            if durations:
+                latencies[op] = round(statistics.median(durations), 4)
+        return latencies
+
+
+class CommandReplayer:
+    """Re-issue a recorded command trace against a session and diff timings and results"""
+
+    def __init__(self, trace_path: str):
+        with gzip.open(trace_path, 'rt', encoding='utf-8') as f:
+            self.entries = [json.loads(line) for line in f if line.strip()]
+        logger.info(f"Loaded {len(self.entries)} WebDriver commands from {trace_path}")
+
+    @classmethod
+    def remap(cls, value, id_map: Dict):
+        """Replace recorded element ids with the ids of the replay session"""
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return {ELEMENT_KEY: id_map.get(value[ELEMENT_KEY], value[ELEMENT_KEY])}
+            return {key: id_map.get(item, item) if key == 'id' and isinstance(item, str) else cls.remap(item, id_map)
+                    for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.remap(item, id_map) for item in value]
+        return value
+
+    @classmethod
+    def learn_ids(cls, recorded, replayed, id_map: Dict):
+        """Pair element ids found at the same place in the recorded and replayed responses"""
+        if isinstance(recorded, dict) and isinstance(replayed, dict):
+            if ELEMENT_KEY in recorded and ELEMENT_KEY in replayed:
+                id_map[recorded[ELEMENT_KEY]] = replayed[ELEMENT_KEY]
+                return
+            for key in recorded.keys() & replayed.keys():
+                cls.learn_ids(recorded[key], replayed[key], id_map)
+        elif isinstance(recorded, list) and isinstance(replayed, list):
+            for rec_item, rep_item in zip(recorded, replayed):
+                cls.learn_ids(rec_item, rep_item, id_map)
+
+    def replay(self, driver, realtime: bool = False) -> List[Dict]:
+        """Replay the trace, at recorded pace or as fast as possible without implicit waits"""
+        id_map = {}
+        diffs = []
+        started = time.perf_counter()
+
+        if not realtime:
+            driver.implicitly_wait(0)
+
+        for entry in self.entries:
+            if entry['c'] == "setTimeouts" and not realtime:
+                continue
+            if realtime:
+                delay = started + entry['o'] - time.perf_counter()
+                if delay > 0:
+                    sleep(delay)
+
+            command_started = time.perf_counter()
+            value, error = None, None
+            try:
+                response = driver.execute(entry['c'], self.remap(entry['p'], id_map))
+                value = encode_trace_value((response or {}).get('value'), CommandRecorder.MAX_VALUE_CHARS)
+            except Exception as e:
+                error = type(e).__name__
+            duration = time.perf_counter() - command_started
+
+            self.learn_ids(entry['v'], value, id_map)
+            diffs.append({
+                'Command': entry['c'],
+                'Recorded': entry['d'],
+                'Replayed': round(duration, 4),
+                'Match': self.remap(entry['v'], id_map) == value and entry['e'] == error,
+                'Expected': entry['e'] or entry['v'],
+                'Actual': error or value
+            })
+
+        self.print_diff(diffs)
+        return diffs
+
+    @staticmethod
+    def print_diff(diffs: List[Dict]):
+        """Print timing per command type and the commands whose results changed"""
+        by_command = {}
+        for diff in diffs:
+            by_command.setdefault(diff['Command'], []).append(diff)
+
+        print("=" * 80)
+        print("REPLAY DIFF")
+        print("=" * 80)
+        recorded = sum(d['Recorded'] for d in diffs)
+        replayed = sum(d['Replayed'] for d in diffs)
+        print(f"Commands: {len(diffs)} | Recorded: {recorded:.2f}s | Replayed: {replayed:.2f}s")
+        print("-" * 80)
+        for command, items in sorted(by_command.items(), key=lambda item: -sum(d['Replayed'] for d in item[1])):
+            rec_mean = statistics.mean(d['Recorded'] for d in items) * 1000
+            rep_mean = statistics.mean(d['Replayed'] for d in items) * 1000
+            print(f"{command:<28} n={len(items):<5} recorded={rec_mean:8.2f}ms | replayed={rep_mean:8.2f}ms | "
+                  f"delta={rep_mean - rec_mean:+8.2f}ms")
+
+        mismatches = [(i, d) for i, d in enumerate(diffs) if not d['Match']]
+        print("-" * 80)
+        print(f"Result mismatches: {len(mismatches)}")
+        for index, diff in mismatches[:20]:
+            print(f"  #{index} {diff['Command']}: expected {str(diff['Expected'])[:80]} | got {str(diff['Actual'])[:80]}")
+        print("=" * 80)
+
+
+class CatalogParser(HTMLParser):
+    """Collect the data-id, data-name and data-price attributes of product buttons"""
+
+    def __init__(self):
+        super().__init__()
+        self.products = {}
+        self.problems = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if 'data-id' not in attrs:
+            return
+        try:
+            product_id = int(attrs['data-id'])
+        except ValueError:
+            self.problems.append(f"product button with invalid data-id '{attrs['data-id']}'")
+            return
+
+        # Listed without a price so rows report it instead of pricing with nan
+        price = None
+        if not attrs.get('data-price'):
+            self.problems.append(f"product {product_id} has no data-price")
+        else:
+            try:
+                price = float(attrs['data-price'])
+            except ValueError:
+                self.problems.append(f"product {product_id} has invalid data-price '{attrs['data-price']}'")
+        self.products[product_id] = {'name': attrs.get('data-name'), 'price': price}
+
+
+class ShopCatalog:
+    """Product catalog of the sweets page, fetched over plain HTTP without a browser"""
+
+    def __init__(self, products: Dict[int, Dict], problems: List[str] = None):
+        self.products = products
+        self.problems = problems or []
+
+    @classmethod
+    def fetch(cls, url: str, timeout: float = 10):
+        """Download the sweets page once and index its products by id"""
+        request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            html = response.read().decode(response.headers.get_content_charset() or 'utf-8')
+
+        parser = CatalogParser()
+        parser.feed(html)
+        if not parser.products:
+            raise ValueError(f"No products with data-id found on {url}")
+        logger.info(f"Fetched catalog of {len(parser.products)} products from {url}")
+        return cls(parser.products, parser.problems)
+
+    def get(self, product_id: int) -> Optional[Dict]:
+        """Return the name and price of a product, or None if it is not listed"""
+        return self.products.get(product_id)
+
+
+class ResourceMonitor:
+    """Sample browser resources between rows and decide when to recycle the session"""
+
+    def __init__(self, helper: SeleniumHelper, max_rss_mb: float = 2048,
+                 max_js_heap_mb: float = 512, max_latency_ms: float = 500, latency_samples: int = 2):
+        self.helper = helper
+        self.max_rss_mb = max_rss_mb
+        self.max_js_heap_mb = max_js_heap_mb
+        self.max_latency_ms = max_latency_ms
+        self.latency_samples = latency_samples
+        self.timeline = []
+        self.restarts = 0
+        self._processes = {}
+        self._metrics_enabled = False
+        self._slow_samples = 0
+
+    def reset_session(self):
+        """Forget per-session state after the driver was restarted"""
+        self._processes = {}
+        self._metrics_enabled = False
+        self._slow_samples = 0
+
+    def _process_tree(self) -> List[psutil.Process]:
+        """Return chromedriver and every Chrome process it spawned"""
+        service = getattr(self.helper.driver, "service", None)
+        if not service or not service.process:
+            return []
+
+        root = psutil.Process(service.process.pid)
+        tree = [root] + root.children(recursive=True)
+
+        # Keep Process objects around so cpu_percent() measures since the last sample
+        processes = {}
+        for proc in tree:
+            processes[proc.pid] = self._processes.get(proc.pid, proc)
+        self._processes = processes
+        return list(processes.values())
+
+    def js_heap_mb(self) -> float:
+        """Read the JS heap size of the current page through CDP"""
+        with self.helper.unrecorded():
+            if not self._metrics_enabled:
+                self.helper.driver.execute_cdp_cmd("Performance.enable", {})
+                self._metrics_enabled = True
+
+            result = self.helper.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        metrics = {m['name']: m['value'] for m in result.get('metrics', [])}
+        return metrics.get('JSHeapUsedSize', 0) / (1024 * 1024)
+
+    def sample(self, test_id: str) -> Dict:
+        """Take one resource sample and append it to the timeline"""
+        rss_mb = 0.0
+        cpu_percent = 0.0
+        for proc in self._process_tree():
+            try:
+                rss_mb += proc.memory_info().rss / (1024 * 1024)
+                cpu_percent += proc.cpu_percent(None)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        start = datetime.now()
+        with self.helper.unrecorded():
+            self.helper.driver.execute_script("return 1;")
+        latency_ms = (datetime.now() - start).total_seconds() * 1000
+
+        sample = {
+            'Time': datetime.now().strftime("%H:%M:%S"),
+            'TestID': test_id,
+            'RSS_MB': round(rss_mb, 1),
+            'CPU_Percent': round(cpu_percent, 1),
+            'JS_Heap_MB': round(self.js_heap_mb(), 1),
+            'Latency_MS': round(latency_ms, 1),
+            'Restarted': False
+        }
+        self.timeline.append(sample)
+        logger.info(f"Resources after {test_id}: RSS={sample['RSS_MB']}MB, CPU={sample['CPU_Percent']}%, "
+                    f"JS heap={sample['JS_Heap_MB']}MB, latency={sample['Latency_MS']}ms")
+        return sample
+
+    def should_recycle(self, sample: Dict) -> bool:
+        """Check a sample against the memory thresholds and the run of slow latency samples"""
+        # One slow round-trip is usually a GC pause or a busy host, only a slow streak means a degraded session
+        if sample['Latency_MS'] > self.max_latency_ms:
+            self._slow_samples += 1
+        else:
+            self._slow_samples = 0
+        return (sample['RSS_MB'] > self.max_rss_mb
+                or sample['JS_Heap_MB'] > self.max_js_heap_mb
+                or self._slow_samples >= self.latency_samples)
+
+    def check(self, test_id: str):
+        """Sample resources and restart the session if a threshold is crossed"""
+        try:
+            sample = self.sample(test_id)
+        except Exception as e:
+            logger.error(f"Error sampling resources: {e}")
+            return self.helper.driver
+
+        if self.should_recycle(sample):
+            logger.warning(f"Resource threshold crossed after {test_id}, restarting WebDriver session")
+            sample['Restarted'] = True
+            self.restarts += 1
+            self.reset_session()
+            return self.helper.restart_driver()
+
+        return self.helper.driver
+
+    def write_report(self, f):
+        """Write the resource timeline into an open report file"""
+        f.write("\nRESOURCE TIMELINE\n")
+        f.write("=" * 80 + "\n")
+        for sample in self.timeline:
+            restarted = " | RESTARTED" if sample['Restarted'] else ""
+            f.write(f"{sample['Time']} {sample['TestID']}: RSS={sample['RSS_MB']}MB | CPU={sample['CPU_Percent']}% | "
+                    f"JS Heap={sample['JS_Heap_MB']}MB | Latency={sample['Latency_MS']}ms{restarted}\n")
+        f.write(f"Session restarts: {self.restarts}\n")
+
+
+RESULT_VALUES = ('PASS', 'FAIL', 'ERROR', 'SKIP')
+
+
+def read_rows(data_path: str) -> Iterator[Tuple[int, Dict]]:
+    """Stream raw rows and their line numbers from a CSV or JSONL file"""
+    with open(data_path, 'r', encoding='utf-8', newline='') as file:
+        if data_path.endswith('.jsonl'):
+            for line, text in enumerate(file, 1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError:
+                    # Reported by from_row so every bad line is listed
+                    row = None
+                if isinstance(row, dict):
+                    row = {key: '|'.join(map(str, value)) if isinstance(value, list) else
+                           ('' if value is None else str(value)) for key, value in row.items()}
+                else:
+                    # A list, string or number parses but is not a row either
+                    row = None
+                yield line, row
+        else:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def parse_ids(value: str) -> Tuple[int, ...]:
+    """Parse product ids written as '', '3', '2|1|9' or a range like '1-10'"""
+    value = value.strip()
+    if not value:
+        return ()
+
+    match = re.fullmatch(r'(\d+)-(\d+)', value)
+    if match:
+        start, end = int(match.group(1)), int(match.group(2))
+        if start < 1 or start > end:
+            raise ValueError(f"invalid product id range '{value}'")
+        return tuple(range(start, end + 1))
+
+    if not re.fullmatch(r'\d+(\|\d+)*', value):
+        raise ValueError(f"invalid product ids '{value}'")
+    ids = tuple(int(v) for v in value.split('|'))
+    if min(ids) < 1:
+        raise ValueError(f"product ids must be positive: '{value}'")
+    return ids
+
+
+def parse_counts(value: str, product_count: int) -> Tuple[int, ...]:
+    """Parse one quantity per product written as '3', '1|2' or 'N each'"""
+    value = value.strip()
+
+    match = re.fullmatch(r'(\d+) each', value)
+    if match:
+        count = int(match.group(1))
+        if count < 1:
+            raise ValueError(f"quantities must be positive: '{value}'")
+        return (count,) * product_count
+
+    if not re.fullmatch(r'\d+(\|\d+)*', value):
+        raise ValueError(f"invalid quantities '{value}'")
+    counts = tuple(int(v) for v in value.split('|'))
+
+    # An empty cart is written with a single zero quantity
+    if product_count == 0 and counts == (0,):
+        return ()
+    if len(counts) != product_count:
+        raise ValueError(f"{len(counts)} quantities given for {product_count} products")
+    if min(counts) < 1:
+        raise ValueError(f"quantities must be positive: '{value}'")
+    return counts
+
+
+def parse_result(value: str) -> str:
+    """Parse the expected outcome of a row"""
+    value = value.strip()
+    if value not in RESULT_VALUES:
+        raise ValueError(f"Expected_Result must be one of {', '.join(RESULT_VALUES)}, got '{value}'")
+    return value
+
+
+class FeatureTest:
+    """Shared setup, data loading, planning and reporting of the feature test classes"""
+
+    BASE_URL = "https://sweetshop.netlify.app/sweets"
+    BASKET_URL = "https://sweetshop.netlify.app/basket"
+    BADGE_SELECTOR = ".badge.badge-success"
+    TOTAL_XPATH = BasketPage.TOTAL_XPATH
+
+    # Seconds per operation used by the dry-run planner when no measurements are given
+    DEFAULT_OP_LATENCY = {
+        'startup': 3.0,
+        'page_load': 1.5,
+        'wait': 0.1,
+        'click': 0.05,
+        'script': 0.02
+    }
+
+    # Set by each feature: report title, row type, default data file and the row used by --benchmark
+    NAME = None
+    CASE_TYPE = None
+    DATA_PATH = None
+    BENCHMARK_ROW = None
+
+    # Named setups that rows can start from through the Checkpoint column
+    CHECKPOINT_SETUPS = {
+        'products_1_10': range(1, 11),
+        'products_1_3': range(1, 4)
+    }
+
+    def __init__(self, backend: str = "webdriver", perf_budget: str = None, checkpoint_dir: str = None,
+                 shard: ShardPlan = None, data_path: str = None, fast_tier: bool = True,
+                 fast_only: bool = False):
+        self.helper = SeleniumHelper(headless=False, backend=backend)
+        self.driver = None
+        self.sweets = SweetsPage(self.helper, self.BASE_URL)
+        self.basket = BasketPage(self.helper, self.BASKET_URL)
+        self.test_results = []
+        self.monitor = ResourceMonitor(self.helper)
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoints = {}
+        self.shard = shard
+        self.log_buffer = None
+        self.fast_tier = fast_tier or fast_only
+        self.fast_only = fast_only
+        self.catalog = None
+        self.catalog_fetched = False
+        self.data_path = data_path or self.DATA_PATH
+        if perf_budget:
+            self.helper.perf = PerformanceCollector(self.helper, perf_budget)
+
+    def setup(self):
+        """Setup test environment"""
+        self.driver = self.helper.start_driver()
+
+    def teardown(self):
+        """Cleanup test environment"""
+        self.helper.quit_driver()
+        if self.helper.recorder:
+            self.helper.recorder.save()
+
+    def clear_cart(self):
+        """Clear cart before each test"""
+        self.helper.clear_storage()
+
+    def add_products(self, product_ids):
+        """Add each product to the cart once, from a single lookup of the product buttons"""
+        self.sweets.open()
+
+        for i in product_ids:
+            product = self.sweets.click_product(i)
+            logger.debug("Adding product %d - %s to cart", i, product['name'])
+
+    def start_from_checkpoint(self, name: str) -> bool:
+        """Restore a named checkpoint, running its setup first if it was not captured yet"""
+        if name not in self.CHECKPOINT_SETUPS:
+            logger.error(f"Unknown checkpoint {name}")
+            return False
+
+        checkpoint_file = os.path.join(self.checkpoint_dir, f"{name}.json") if self.checkpoint_dir else None
+
+        try:
+            if name not in self.checkpoints and checkpoint_file and os.path.exists(checkpoint_file):
+                with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                    self.checkpoints[name] = json.load(f)
+
+            if name in self.checkpoints:
+                logger.info(f"Restoring checkpoint {name}")
+                self.helper.get(self.BASE_URL)
+                self.helper.restore_storage(self.checkpoints[name])
+                return True
+
+            logger.info(f"Capturing checkpoint {name}")
+            self.add_products(self.CHECKPOINT_SETUPS[name])
+            self.checkpoints[name] = self.helper.snapshot_storage()
+        except Exception as e:
+            logger.error(f"Error preparing checkpoint {name}: {e}")
+            return False
+
+        if checkpoint_file:
+            # Write aside and rename so other workers never read a half-written file
+            temp_file = f"{checkpoint_file}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(self.checkpoint_dir, exist_ok=True)
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.checkpoints[name], f)
+                os.replace(temp_file, checkpoint_file)
+            except OSError as e:
+                logger.warning(f"Could not share checkpoint {name}: {e}")
+        return True
+
+    def get_catalog(self) -> Optional[ShopCatalog]:
+        """Fetch the product catalog on first use, None if the page could not be indexed"""
+        if not self.catalog_fetched:
+            self.catalog_fetched = True
+            try:
+                self.catalog = ShopCatalog.fetch(self.BASE_URL)
+            except Exception as e:
+                logger.warning(f"HTTP tier unavailable, routing rows to the browser: {e}")
+        return self.catalog
+
+    def check_catalog(self) -> List[str]:
+        """Check that every product referenced by the test data is listed on the sweets page"""
+        start = time.perf_counter()
+        catalog = self.get_catalog()
+        if not catalog:
+            return []
+
+        problems = list(catalog.problems)
+        for test_case in self.iter_test_data():
+            problems.extend(self.catalog_problems(test_case, catalog))
+
+        for problem in problems:
+            logger.warning(f"Catalog check: {problem}")
+        logger.info(f"Catalog check finished, {len(problems)} problems")
+
+        actual = 'FAIL' if problems else 'PASS'
+        self.test_results.append({
+            'TestID': 'CATALOG',
+            'Description': 'Products referenced by the test data match the sweets page',
+            'Expected': 'PASS',
+            'Actual': actual,
+            'Status': actual,
+            'Perf': None,
+            'Duration': round(time.perf_counter() - start, 3),
+            'Tier': 'http',
+            'Problems': problems
+        })
+        return problems
+
+    def catalog_problems(self, test_case, catalog: ShopCatalog) -> List[str]:
+        """Problems with the products one row references"""
+        return [f"{test_case.test_id}: product {product_id} is not in the catalog"
+                for product_id in test_case.product_ids if catalog.get(product_id) is None]
+
+    def track_latency(self, metric: str, by: str, selector: str):
+        """Measure click-to-DOM-update latency when performance capture is on"""
+        if not self.helper.perf:
+            return contextlib.nullcontext()
+        return self.helper.perf.track(metric, by, selector)
+
+    def iter_test_data(self) -> Iterator:
+        """Stream typed test cases from the CSV or JSONL test data file"""
+        for line, row in read_rows(self.data_path):
+            try:
+                yield self.CASE_TYPE.from_row(row)
+            except ValueError as e:
+                raise ValueError(f"{os.path.basename(self.data_path)} line {line}: {e}") from e
+
+    def load_test_data(self) -> List:
+        """Load all test cases into memory"""
+        test_data = list(self.iter_test_data())
+        logger.info(f"Loaded {len(test_data)} test cases from {os.path.basename(self.data_path)}")
+        return test_data
+
+    def validate_test_data(self) -> List[str]:
+        """Parse every row once and collect schema errors before any browser starts"""
+        errors = []
+        seen = set()
+        count = 0
+        for line, row in read_rows(self.data_path):
+            count += 1
+            try:
+                test_case = self.CASE_TYPE.from_row(row)
+            except ValueError as e:
+                errors.append(f"line {line}: {e}")
+                continue
+            if test_case.test_id in seen:
+                errors.append(f"line {line}: duplicate TestID {test_case.test_id}")
+            seen.add(test_case.test_id)
+            if test_case.checkpoint and test_case.checkpoint not in self.CHECKPOINT_SETUPS:
+                errors.append(f"line {line}: unknown checkpoint '{test_case.checkpoint}'")
+            elif test_case.checkpoint:
+                # The checkpoint replaces the row's own setup, so both must add the same products
+                setup = list(self.CHECKPOINT_SETUPS[test_case.checkpoint])
+                if setup != list(test_case.product_ids):
+                    errors.append(f"line {line}: checkpoint '{test_case.checkpoint}' adds products {setup} "
+                                  f"but the row lists {list(test_case.product_ids)}")
+
+        logger.info(f"Validated {count} test cases from {os.path.basename(self.data_path)}, {len(errors)} errors")
+        return errors
+
+    def benchmark_click_latency(self, test_id: str):
+        """Compare per-command latency of the WebDriver and CDP paths on a click-heavy row"""
+        test_case = next(row for row in self.iter_test_data() if row.test_id == test_id)
+        product_id = test_case.product_ids[0]
+        clicks = test_case.quantities[0]
+        selector = f'[data-id="{product_id}"]'
+
+        if not self.helper.cdp:
+            raise RuntimeError("Benchmark needs the CDP backend to be connected")
+
+        timings = {}
+        for backend in ("webdriver", "cdp"):
+            samples = {'navigate': [], 'click': [], 'script': []}
+            self.clear_cart()
+
+            start = time.perf_counter()
+            if backend == "cdp":
+                self.helper.cdp.navigate(self.BASE_URL)
+            else:
+                self.driver.get(self.BASE_URL)
+            samples['navigate'].append(time.perf_counter() - start)
+
+            element = WebDriverWait(self.driver, 10).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+            )
+            for _ in range(clicks):
+                start = time.perf_counter()
+                if backend == "cdp":
+                    self.helper.cdp.click(selector)
+                else:
+                    element.click()
+                samples['click'].append(time.perf_counter() - start)
+
+            # As many script round-trips as clicks, so both get comparable percentiles
+            for _ in range(clicks):
+                start = time.perf_counter()
+                if backend == "cdp":
+                    self.helper.cdp.evaluate("window.localStorage.length")
+                else:
+                    self.driver.execute_script("return window.localStorage.length;")
+                samples['script'].append(time.perf_counter() - start)
+
+            timings[backend] = samples
+
+        print("=" * 80)
+        print(f"BACKEND LATENCY BENCHMARK - {test_id} ({clicks} clicks)")
+        print("=" * 80)
+        for command in ('navigate', 'click', 'script'):
+            for backend, samples in timings.items():
+                values = sorted(samples[command])
+                p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+                print(f"{command:<10} {backend:<10} mean={statistics.mean(values) * 1000:8.2f}ms | "
+                      f"median={statistics.median(values) * 1000:8.2f}ms | p95={p95 * 1000:8.2f}ms | n={len(values)}")
+        print("=" * 80)
+        self.clear_cart()
+        return timings
+
+    def plan_add_products(self, count: int) -> Counter:
+        """Operations issued by add_products for count products"""
+        return Counter(page_load=1, script=1, click=count)
+
+    def plan_checkpoint(self, name: str, checkpoints: set) -> Counter:
+        """Operations to capture a checkpoint the first time and restore it afterwards"""
+        if name in checkpoints:
+            return Counter(page_load=1, script=2)
+        checkpoints.add(name)
+        return self.plan_add_products(len(self.CHECKPOINT_SETUPS[name])) + Counter(script=2)
+
+    def plan_row(self, test_case, checkpoints: set) -> Optional[Counter]:
+        """Estimate the WebDriver operations one row issues, None if the run skips it"""
+        # clear_cart and the resource sample after each row
+        ops = Counter(script=6)
+        method = test_case.test_id
+        if self.fast_tier and hasattr(self, f"fast_{method}"):
+            return Counter()
+        if self.fast_only:
+            return None
+        if not hasattr(self, f"test_{method}"):
+            return ops
+        if self.helper.perf:
+            ops['script'] += 2
+        return ops + self.plan_test(test_case, checkpoints)
+
+    def plan_test(self, test_case, checkpoints: set) -> Counter:
+        """Operations issued by the test method of one row, estimated by each feature"""
+        return Counter()
+
+    def dry_run(self, latencies_path: str = None, top: int = 10):
+        """Estimate operations and wall-clock time of a run without starting a browser"""
+        latencies = dict(self.DEFAULT_OP_LATENCY)
+        if latencies_path and latencies_path.endswith('.jsonl.gz'):
+            # A recorded trace is measured on the fly
+            latencies.update(CommandRecorder.op_latencies(CommandReplayer(latencies_path).entries))
+        elif latencies_path:
+            with open(latencies_path, 'r', encoding='utf-8') as f:
+                latencies.update(json.load(f))
+
+        checkpoints = set(self.checkpoints)
+        if self.checkpoint_dir and os.path.isdir(self.checkpoint_dir):
+            checkpoints.update(os.path.splitext(name)[0] for name in os.listdir(self.checkpoint_dir)
+                               if name.endswith('.json'))
+
+        totals = Counter()
+        rows = 0
+        browser = False
+        expensive = []
+        for test_case in self.iter_test_data():
+            if self.shard and not self.shard.includes(test_case.test_id):
+                continue
+            ops = self.plan_row(test_case, checkpoints)
+            if ops is None:
+                continue
+            # Rows answered over HTTP issue no WebDriver operations
+            browser = browser or bool(ops)
+            seconds = sum(count * latencies[op] for op, count in ops.items())
+            totals.update(ops)
+            rows += 1
+
+            # Keep only the most expensive rows so large data sets stay cheap to plan
+            entry = (seconds, test_case.test_id, ops)
+            if len(expensive) < top:
+                heapq.heappush(expensive, entry)
+            elif entry > expensive[0]:
+                heapq.heapreplace(expensive, entry)
+
+        # Chrome starts lazily, so its startup only counts if some row needs it
+        predicted = (latencies['startup'] if browser else 0.0) + sum(count * latencies[op] for op, count in totals.items())
+
+        print("=" * 80)
+        print(f"{self.NAME.upper()} - DRY RUN")
+        print("=" * 80)
+        print(f"Rows: {rows} | Page loads: {totals['page_load']} | Clicks: {totals['click']} | "
+              f"Waits: {totals['wait']} | Round-trips: {sum(totals.values())}")
+        print(f"Predicted wall-clock: {predicted:.1f}s")
+        print("-" * 80)
+        print("Most expensive rows:")
+        for seconds, test_id, ops in sorted(expensive, reverse=True):
+            print(f"  {test_id}: {seconds:.2f}s | page loads={ops['page_load']} | clicks={ops['click']} | "
+                  f"waits={ops['wait']} | round-trips={sum(ops.values())}")
+        print("=" * 80)
+        return predicted
+
+    def run_test_case(self, test_case) -> Optional[Dict]:
+        """Run one row on the tier it needs and record its result"""
+        test_id = test_case.test_id
+
+        # Rows with a fast_ method only need catalog data and skip the browser
+        fast_method = getattr(self, f"fast_{test_id}", None) if self.fast_tier else None
+        if fast_method and not self.get_catalog():
+            fast_method = None
+        if self.fast_only and not fast_method:
+            return None
+
+        log_context.test_id = test_id
+        perf = None
+
+        if fast_method:
+            log_context.step = "http"
+            start = time.perf_counter()
+            result = fast_method(test_case)
+            duration = round(time.perf_counter() - start, 3)
+        else:
+            if not self.driver:
+                self.setup()
+
+            log_context.step = "clear"
+            self.clear_cart()
+            start = time.perf_counter()
+
+            test_method_name = f"test_{test_id}"
+            test_method = getattr(self, test_method_name, None)
+
+            if self.helper.perf:
+                self.helper.perf.begin()
+
+            if not test_method:
+                logger.warning(f"Test method {test_method_name} not found")
+                result = "SKIP"
+            else:
+                log_context.step = "checkpoint"
+                if test_case.checkpoint and not self.start_from_checkpoint(test_case.checkpoint):
+                    result = "ERROR"
+                else:
+                    log_context.step = "test"
+                    result = test_method(test_case)
+
+            duration = round(time.perf_counter() - start, 3)
+
+            if self.helper.perf:
+                violations = self.helper.perf.violations()
+                perf = "OVER BUDGET: " + ", ".join(violations) if violations else "OK"
+
+            # A restarted session invalidates the driver held by this test
+            log_context.step = "monitor"
+            self.driver = self.monitor.check(test_id)
+
+        status = 'PASS' if result == test_case.expected_result else 'FAIL'
+        if self.log_buffer:
+            self.log_buffer.flush_row(failed=status == 'FAIL')
+
+        self.test_results.append({
+            'TestID': test_id,
+            'Description': test_case.description,
+            'Expected': test_case.expected_result,
+            'Actual': result,
+            'Status': status,
+            'Perf': perf,
+            'Duration': duration,
+            'Tier': 'http' if fast_method else 'browser'
+        })
+        log_context.test_id = "-"
+        return self.test_results[-1]
+
+    def run_all_tests(self):
+        """Run all test cases from CSV"""
+        test_data = self.iter_test_data()
+
+        print("=" * 80)
+        print(f"{self.NAME.upper()} - TEST EXECUTION")
+        if self.shard:
+            print(f"Shard {self.shard}")
+        print("=" * 80)
+
+        # The check covers every row, so only one shard reports it and merging keeps a single result
+        if self.fast_tier and (not self.shard or self.shard.index == 1):
+            self.check_catalog()
+
+        for test_case in test_data:
+            if self.shard and not self.shard.includes(test_case.test_id):
+                continue
+            if self.run_test_case(test_case):
+                print("-" * 80)
+
+        self.print_summary()
+
+    @staticmethod
+    def totals(results: List[Dict]) -> Tuple[int, int, int, float]:
+        """Count total, passed and failed rows and the pass rate in percent"""
+        total = len(results)
+        passed = sum(1 for r in results if r['Status'] == 'PASS')
+        return total, passed, total - passed, passed / total * 100 if total else 0.0
+
+    def print_summary(self):
+        """Print test execution summary"""
+        print("\n" + "=" * 80)
+        print("TEST EXECUTION SUMMARY")
+        print("=" * 80)
+
+        for result in self.test_results:
+            status_symbol = "✓" if result['Status'] == 'PASS' else "✗"
+            tier = " [http]" if result.get('Tier') == 'http' else ""
+            print(f"{status_symbol} {result['TestID']}{tier}: {result['Description']}")
+            perf = f" | Perf: {result['Perf']}" if result.get('Perf') else ""
+            print(f"  Expected: {result['Expected']} | Actual: {result['Actual']} | Status: {result['Status']}{perf}")
+            for problem in result.get('Problems', []):
+                print(f"  - {problem}")
+
+        total, passed, failed, pass_rate = self.totals(self.test_results)
+
+        print("=" * 80)
+        print(f"Total: {total} | Passed: {passed} | Failed: {failed}")
+        print(f"Pass Rate: {pass_rate:.2f}%")
+        print(f"Session restarts: {self.monitor.restarts}")
+        if self.helper.perf:
+            over_budget = sum(1 for r in self.test_results if r.get('Perf', 'OK') != 'OK')
+            print(f"Rows over performance budget: {over_budget}")
+        print("=" * 80)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_file = f"test_report_{timestamp}.txt"
+
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(f"{self.NAME.upper()} - TEST EXECUTION REPORT\n")
+            f.write("=" * 80 + "\n\n")
+            for result in self.test_results:
+                f.write(f"{result['TestID']}: {result['Description']}\n")
+                perf = f" | Perf: {result['Perf']}" if result.get('Perf') else ""
+                f.write(f"Expected: {result['Expected']} | Actual: {result['Actual']} | Status: {result['Status']}{perf}\n")
+                for problem in result.get('Problems', []):
+                    f.write(f"  - {problem}\n")
+                f.write("\n")
+            f.write("=" * 80 + "\n")
+            f.write(f"Total: {total} | Passed: {passed} | Failed: {failed}\n")
+            f.write(f"Pass Rate: {pass_rate:.2f}%\n")
+            self.monitor.write_report(f)
+
+        logger.info(f"Test report saved to {report_file}")
+
+    def save_results(self, results_path: str):
+        """Write the results of this run to a JSON file for merging"""
+        with open(results_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'shard': str(self.shard) if self.shard else None,
+                'restarts': self.monitor.restarts,
+                'results': self.test_results
+            }, f, ensure_ascii=False, indent=2)
+        logger.info(f"Results saved to {results_path}")
+
+    def merge_results(self, results_paths: List[str]):
+        """Combine per-shard result files into this run's results"""
+        merged = {}
+        for results_path in results_paths:
+            with open(results_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for result in data['results']:
+                if result['TestID'] in merged:
+                    logger.warning(f"{result['TestID']} found in more than one shard, keeping {results_path}")
+                merged[result['TestID']] = result
+            self.monitor.restarts += data.get('restarts', 0)
+
+        self.test_results = sorted(merged.values(), key=lambda r: r['TestID'])
+        logger.info(f"Merged {len(self.test_results)} results from {len(results_paths)} files")
+
+    def run_mode(self, args) -> bool:
+        """Run a feature-specific mode selected on the command line, False if none was"""
+        return False
+
+
+def method_fingerprints(source: str, class_name: str) -> Dict[str, str]:
+    """Map each test_/fast_ method of a class to its source, plus '__rest__' for everything else"""
+    tree = ast.parse(source)
+    methods = {}
+    rest = source
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name.startswith(('test_TC_', 'fast_TC_')):
+                    segment = ast.get_source_segment(source, item)
+                    methods[item.name] = segment
+                    rest = rest.replace(segment, "", 1)
+    methods['__rest__'] = rest
+    return methods
+
+
+def changed_methods(old: Dict[str, str], new: Dict[str, str]) -> set:
+    """Names of methods whose source changed, including methods that call a changed one"""
+    changed = {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+    # test_TC_001_005 delegates to test_TC_001_004, so follow calls until nothing new is added
+    while True:
+        callers = {name for name, source in new.items()
+                   if name not in changed and any(f"self.{callee}(" in source for callee in changed)}
+        if not callers:
+            return changed
+        changed |= callers
+
+
+def run_watched(test, test_cases: List):
+    """Run a batch of rows on the warm session and print one line per row"""
+    start = time.perf_counter()
+    test.test_results = []
+    for test_case in test_cases:
+        if test.shard and not test.shard.includes(test_case.test_id):
+            continue
+        test.run_test_case(test_case)
+
+    print("=" * 80)
+    for result in test.test_results:
+        status_symbol = "✓" if result['Status'] == 'PASS' else "✗"
+        print(f"{status_symbol} {result['TestID']}: {result['Actual']} (expected {result['Expected']}) "
+              f"in {result['Duration']:.2f}s")
+    print(f"{len(test.test_results)} rows in {time.perf_counter() - start:.1f}s, watching for changes...")
+    print("=" * 80)
+
+
+def watch(test, interval: float = 0.5):
+    """Keep the browser warm and re-run only the rows affected by each saved change
+
+    Edits to the feature module take effect on the live instance, and edits outside its test
+    class re-run every row. Changes to this module need a restart.
+    """
+    module_name = type(test).__module__
+    module_path = os.path.abspath(sys.modules[module_name].__file__)
+    data_path = os.path.abspath(test.data_path)
+    class_name = type(test).__name__
+
+    mtimes = {path: os.stat(path).st_mtime_ns for path in (module_path, data_path)}
+    with open(module_path, 'r', encoding='utf-8') as f:
+        methods = method_fingerprints(f.read(), class_name)
+    rows = {test_case.test_id: test_case for test_case in test.iter_test_data()}
+    generation = 0
+
+    if not test.driver:
+        test.setup()
+    run_watched(test, list(rows.values()))
+
+    try:
+        while True:
+            sleep(interval)
+
+            # Stat before reading, a save landing mid-poll then shows up again on the next one
+            changed = {}
+            for path in mtimes:
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    # Editors may replace the file while saving
+                    continue
+                if mtime != mtimes[path]:
+                    changed[path] = mtime
+            if not changed:
+                continue
+
+            affected = set()
+
+            # Each path is handled on its own, a failure in one does not drop the other
+            if data_path in changed:
+                errors = test.validate_test_data()
+                if errors:
+                    for error in errors[:10]:
+                        logger.error(f"Test data error: {error}")
+                else:
+                    new_rows = {test_case.test_id: test_case for test_case in test.iter_test_data()}
+                    affected |= {test_id for test_id, test_case in new_rows.items()
+                                 if rows.get(test_id) != test_case}
+                    rows = new_rows
+                mtimes[data_path] = changed[data_path]
+
+            if module_path in changed:
+                try:
+                    with open(module_path, 'r', encoding='utf-8') as f:
+                        source = f.read()
+                    new_methods = method_fingerprints(source, class_name)
+                    generation += 1
+                    spec = importlib.util.spec_from_file_location(f"{module_name}_watch_{generation}", module_path)
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                except Exception as e:
+                    logger.error(f"Could not reload {os.path.basename(module_path)}: {e}")
+                else:
+                    # The reloaded module gets a new name, keep logging through the configured logger
+                    module.logger = logging.getLogger(module_name)
+                    test.__class__ = getattr(module, class_name)
+
+                    names = changed_methods(methods, new_methods)
+                    methods = new_methods
+                    if '__rest__' in names:
+                        affected |= set(rows)
+                    else:
+                        affected |= {test_id for test_id in rows
+                                     if f"test_{test_id}" in names or f"fast_{test_id}" in names}
+                mtimes[module_path] = changed[module_path]
+
+            if affected:
+                logger.info(f"Re-running {len(affected)} rows: {', '.join(sorted(affected))}")
+                run_watched(test, [test_case for test_id, test_case in rows.items() if test_id in affected])
+            else:
+                logger.info("Change detected, no rows affected")
+    except KeyboardInterrupt:
+        logger.info("Watch mode stopped")
+
+
+def shard_arg(value: str) -> str:
+    """argparse type that turns a malformed --shard into a usage error"""
+    try:
+        ShardPlan.parse_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def build_parser(test_class) -> argparse.ArgumentParser:
+    """Command line options shared by the feature runners"""
+    parser = argparse.ArgumentParser(description=f"{test_class.NAME} test runner")
+    parser.add_argument("--backend", choices=["webdriver", "cdp"], default="webdriver",
+                        help="Driver backend for navigation, clicks, scripts and storage")
+    parser.add_argument("--benchmark", action="store_true",
+                        help=f"Benchmark per-command latency of both backends on {test_class.BENCHMARK_ROW}")
+    parser.add_argument("--perf", action="store_true",
+                        help="Collect page timings and check them against perf_budget.csv")
+    parser.add_argument("--perf-budget", default=os.path.join(os.path.dirname(test_class.DATA_PATH), "perf_budget.csv"),
+                        help="Path to the per-page performance budget file")
+    parser.add_argument("--checkpoint-dir",
+                        help="Directory where checkpoints are saved and shared between workers of one run")
+    parser.add_argument("--run-id", default=f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}",
+                        help="Id shared by the workers of one run, checkpoints of other runs are not reused")
+    parser.add_argument("--shard", type=shard_arg,
+                        help="Run only shard i of n, e.g. 2/4")
+    parser.add_argument("--durations",
+                        help="Results file from an earlier run used to balance shards by row duration")
+    parser.add_argument("--results-out",
+                        help="Write results to a JSON file that --merge can combine")
+    parser.add_argument("--merge", nargs="+", metavar="RESULTS",
+                        help="Merge per-shard result files into one summary without running tests")
+    parser.add_argument("--data",
+                        help="CSV or JSONL test data file, defaults to test_data.csv")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Estimate operations and wall-clock time without starting a browser")
+    parser.add_argument("--latencies",
+                        help="Seconds per operation (startup, page_load, wait, click, script) as JSON, "
+                             "e.g. the .latencies.json written by --record, or a recorded .jsonl.gz trace")
+    parser.add_argument("--log-json",
+                        help="Also write structured JSON log records to this file")
+    parser.add_argument("--record", metavar="TRACE",
+                        help="Record every WebDriver command of the run to a .jsonl.gz trace and its operation latencies")
+    parser.add_argument("--replay", metavar="TRACE",
+                        help="Replay a recorded trace against a fresh session and diff timings and results")
+    parser.add_argument("--replay-realtime", action="store_true",
+                        help="Keep the recorded pacing and timeouts instead of replaying at full speed")
+    parser.add_argument("--fast-only", action="store_true",
+                        help="Run only the rows the HTTP tier can answer, without starting Chrome")
+    parser.add_argument("--no-fast-tier", action="store_true",
+                        help="Run every row in the browser")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep the browser open and re-run rows affected by saved changes")
+    parser.add_argument("--watch-interval", type=float, default=0.5,
+                        help="Seconds between checks for changed files in watch mode")
+    parser.add_argument("--max-rss-mb", type=float, default=2048,
+                        help="Restart the browser session when Chrome and chromedriver use more RSS than this")
+    parser.add_argument("--max-js-heap-mb", type=float, default=512,
+                        help="Restart the browser session when the page's JS heap grows past this")
+    parser.add_argument("--max-latency-ms", type=float, default=500,
+                        help="Round-trip latency above which a resource sample counts as slow")
+    parser.add_argument("--latency-samples", type=positive_int, default=2,
+                        help="Slow samples in a row needed before the session is restarted for latency")
+    return parser
+
+
+def run(test_class, parser: argparse.ArgumentParser):
+    """Parse the command line and run a feature test class in the selected mode"""
+    args = parser.parse_args()
+
+    listener, row_buffer = setup_logging(args.log_json, (test_class.__module__,))
+    if args.shard:
+        log_context.worker = f"shard-{args.shard}"
+
+    test = test_class(backend="cdp" if args.benchmark else args.backend,
+                      perf_budget=args.perf_budget if args.perf else None,
+                      checkpoint_dir=os.path.join(args.checkpoint_dir, args.run_id) if args.checkpoint_dir else None,
+                      shard=ShardPlan.parse(args.shard, args.durations) if args.shard else None,
+                      data_path=args.data,
+                      fast_tier=not args.no_fast_tier,
+                      fast_only=args.fast_only)
+    test.log_buffer = row_buffer
+    test.monitor = ResourceMonitor(test.helper, max_rss_mb=args.max_rss_mb, max_js_heap_mb=args.max_js_heap_mb,
+                                   max_latency_ms=args.max_latency_ms, latency_samples=args.latency_samples)
+    if args.record:
+        test.helper.recorder = CommandRecorder(args.record)
+
+    if args.merge:
+        test.merge_results(args.merge)
+        test.print_summary()
+        if args.results_out:
+            test.save_results(args.results_out)
+        listener.stop()
+        return
+
+    errors = test.validate_test_data()
+    if errors:
+        for error in errors[:50]:
+            logger.error(f"Test data error: {error}")
+        logger.error(f"{len(errors)} test data errors, not starting the browser")
+        listener.stop()
+        return
+
+    if args.dry_run:
+        test.dry_run(args.latencies)
+        listener.stop()
+        return
+
+    try:
+        # The regular run starts Chrome lazily, only once a row needs it
+        if args.replay or args.benchmark:
+            test.setup()
+
+        if args.watch:
+            watch(test, args.watch_interval)
+        elif args.replay:
+            CommandReplayer(args.replay).replay(test.driver, realtime=args.replay_realtime)
+        elif args.benchmark:
+            test.benchmark_click_latency(test.BENCHMARK_ROW)
+        elif not test.run_mode(args):
+            test.run_all_tests()
+            if args.results_out:
+                test.save_results(args.results_out)
+    except Exception as e:
+        logger.error(f"Test execution failed: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        test.teardown()
+        listener.stop()
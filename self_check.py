@@ -0,0 +1,191 @@
+#
+# File: self_check.py
+# Author: TiDz
+# Contact: nguyentinvs123@gmail.com
+# Created on Mon Oct 19 2026
+# Description: Offline checks of the runner logic in common.py that needs no browser
+# Useage: python self_check.py
+#
+
+
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+from common import (ELEMENT_KEY, CommandReplayer, FeatureTest, ShardPlan, changed_methods, parse_counts,
+                    parse_ids, read_rows)
+
+
+def make_results(test_ids, failing=()):
+    """Build result records the way run_test_case writes them"""
+    return [{
+        'TestID': test_id,
+        'Description': f"Row {test_id}",
+        'Expected': 'PASS',
+        'Actual': 'FAIL' if test_id in failing else 'PASS',
+        'Status': 'FAIL' if test_id in failing else 'PASS',
+        'Perf': None,
+        'Duration': 1.0,
+        'Tier': 'browser'
+    } for test_id in test_ids]
+
+
+def assert_raises(error, func, *args):
+    """Fail unless calling func with args raises error"""
+    try:
+        func(*args)
+    except error:
+        return
+    raise AssertionError(f"{func.__name__}{args} did not raise {error.__name__}")
+
+
+def check_shard_balance():
+    """Slowest rows go first, each to the lightest shard, ties to the lower shard"""
+    durations = {'TC_A': 5.0, 'TC_B': 4.0, 'TC_C': 3.0, 'TC_D': 2.0, 'TC_E': 1.0}
+    assignment = ShardPlan.balance(durations, 2)
+    assert assignment == {'TC_A': 0, 'TC_B': 1, 'TC_C': 1, 'TC_D': 0, 'TC_E': 0}, assignment
+    assert ShardPlan.balance({}, 3) == {}
+
+
+def check_shard_includes():
+    """Every row lands in exactly one shard, with and without known durations"""
+    test_ids = [f"TC_{i:03d}" for i in range(1, 41)]
+    durations = {test_id: float(i % 7) for i, test_id in enumerate(test_ids[:20])}
+    for count in (1, 2, 3, 5):
+        plans = [ShardPlan(index, count, durations) for index in range(1, count + 1)]
+        for test_id in test_ids:
+            owners = [str(plan) for plan in plans if plan.includes(test_id)]
+            assert len(owners) == 1, f"{test_id} is in shards {owners} of {count}"
+
+
+def check_merge_totals():
+    """Merging the shard result files gives the totals and pass rate of an unsharded run"""
+    test_ids = [f"TC_{i:03d}" for i in range(1, 12)]
+    unsharded = make_results(test_ids, failing={'TC_003', 'TC_008'})
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for index in range(1, 4):
+            shard = FeatureTest()
+            shard.shard = ShardPlan(index, 3)
+            shard.test_results = [r for r in unsharded if shard.shard.includes(r['TestID'])]
+            shard.monitor.restarts = index
+            paths.append(os.path.join(folder, f"shard_{index}.json"))
+            shard.save_results(paths[-1])
+
+        merged = FeatureTest()
+        merged.merge_results(paths)
+
+    assert [r['TestID'] for r in merged.test_results] == test_ids
+    assert FeatureTest.totals(merged.test_results) == FeatureTest.totals(unsharded)
+    assert FeatureTest.totals(unsharded) == (11, 9, 2, 9 / 11 * 100)
+    assert merged.monitor.restarts == 6
+    assert json.loads(json.dumps(merged.test_results)) == unsharded
+
+
+def check_parse_ids():
+    """Product ids accept empty, single, pipe-separated and range forms and reject the rest"""
+    assert parse_ids('') == ()
+    assert parse_ids(' 3 ') == (3,)
+    assert parse_ids('2|1|9') == (2, 1, 9)
+    assert parse_ids('1-4') == (1, 2, 3, 4)
+    for value in ('0', '4-2', '0-3', '1,2', '1|', 'a'):
+        assert_raises(ValueError, parse_ids, value)
+
+
+def check_parse_counts():
+    """Quantities accept one per product or 'N each', and a single zero for an empty cart"""
+    assert parse_counts('3', 1) == (3,)
+    assert parse_counts('1|2', 2) == (1, 2)
+    assert parse_counts('2 each', 3) == (2, 2, 2)
+    assert parse_counts('0', 0) == ()
+    for value, product_count in (('1|2', 3), ('0', 1), ('0 each', 2), ('1 |2', 2), ('', 1)):
+        assert_raises(ValueError, parse_counts, value, product_count)
+
+
+def check_read_rows():
+    """JSONL rows are flattened to strings, and lines that are not JSON objects become None"""
+    with tempfile.TemporaryDirectory() as folder:
+        data_path = os.path.join(folder, "rows.jsonl")
+        with open(data_path, 'w', encoding='utf-8') as f:
+            f.write('{"TestID": "TC_1", "Product_IDs": [1, 2], "Checkpoint": null}\n\n')
+            f.write('[1, 2]\n"TC_2"\n{broken\n')
+        rows = list(read_rows(data_path))
+
+    assert rows == [(1, {'TestID': 'TC_1', 'Product_IDs': '1|2', 'Checkpoint': ''}),
+                    (3, None), (4, None), (5, None)], rows
+
+
+def check_replay_ids():
+    """Element ids seen in replayed responses replace the recorded ones in later commands"""
+    id_map = {}
+    recorded = [{ELEMENT_KEY: 'rec-1'}, {ELEMENT_KEY: 'rec-2'}]
+    replayed = [{ELEMENT_KEY: 'new-1'}, {ELEMENT_KEY: 'new-2'}, {ELEMENT_KEY: 'new-3'}]
+    CommandReplayer.learn_ids(recorded, replayed, id_map)
+    CommandReplayer.learn_ids({'value': {ELEMENT_KEY: 'rec-3'}}, {'value': None}, id_map)
+    assert id_map == {'rec-1': 'new-1', 'rec-2': 'new-2'}, id_map
+
+    params = {'id': 'rec-1', 'text': 'rec-2', 'args': [{ELEMENT_KEY: 'rec-2'}, {ELEMENT_KEY: 'rec-9'}, 'rec-1']}
+    assert CommandReplayer.remap(params, id_map) == {
+        'id': 'new-1', 'text': 'rec-2', 'args': [{ELEMENT_KEY: 'new-2'}, {ELEMENT_KEY: 'rec-9'}, 'rec-1']
+    }
+    assert CommandReplayer.remap("rec-1", id_map) == "rec-1"
+
+
+def check_changed_methods():
+    """Edited, added and removed methods are re-run, together with methods that call them"""
+    old = {
+        'test_TC_1': "def test_TC_1(self): return 1",
+        'test_TC_2': "def test_TC_2(self): return self.test_TC_1()",
+        'test_TC_3': "def test_TC_3(self): return self.test_TC_2()",
+        'test_TC_4': "def test_TC_4(self): return 4",
+        'test_TC_5': "def test_TC_5(self): return 5",
+        '__rest__': "class Feature: pass"
+    }
+    assert changed_methods(old, dict(old)) == set()
+
+    new = dict(old, test_TC_1="def test_TC_1(self): return 2", test_TC_6="def test_TC_6(self): return 6")
+    del new['test_TC_5']
+    assert changed_methods(old, new) == {'test_TC_1', 'test_TC_2', 'test_TC_3', 'test_TC_5', 'test_TC_6'}
+
+    assert changed_methods(old, dict(old, __rest__="class Feature: x = 1")) == {'__rest__'}
+
+
+CHECKS = [
+    check_shard_balance,
+    check_shard_includes,
+    check_merge_totals,
+    check_parse_ids,
+    check_parse_counts,
+    check_read_rows,
+    check_replay_ids,
+    check_changed_methods,
+]
+
+
+def main():
+    """Run every check and exit non-zero if one fails"""
+    print("=" * 80)
+    print("SELF CHECK")
+    print("=" * 80)
+
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"✓ {check.__name__}: {check.__doc__}")
+        except Exception:
+            failed += 1
+            print(f"✗ {check.__name__}: {check.__doc__}")
+            traceback.print_exc()
+
+    print("=" * 80)
+    print(f"Total: {len(CHECKS)} | Passed: {len(CHECKS) - failed} | Failed: {failed}")
+    print("=" * 80)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()